@@ -1,19 +1,15 @@
 import streamlit as st
-import bcrypt
-from app.data.db import connect_database
-from app.data.users import verify_user, get_user_role, insert_user, get_user_by_username
+from app.services.user_service import authenticate, register_user
 
 st.set_page_config(page_title="Login")
-def get_conn():
-    return connect_database()
-conn = get_conn()
-
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "username" not in st.session_state:
     st.session_state.username = ""
 if "role" not in st.session_state:
     st.session_state.role = ""
+if "principal" not in st.session_state:
+    st.session_state.principal = None
 
 st.title("Login Page")
 if st.session_state.logged_in:
@@ -29,10 +25,12 @@ with tab1:
     password = st.text_input("Password", type="password", key="login_pass")
 
     if st.button("Login"):
-        if verify_user(username, password):
+        principal = authenticate(username, password)
+        if principal:
+            st.session_state.principal = principal
             st.session_state.logged_in = True
-            st.session_state.username = username
-            st.session_state.role = get_user_role(username)
+            st.session_state.username = principal.username
+            st.session_state.role = principal.role
             st.success("Login successful!")
             st.rerun()
         else:
@@ -49,9 +47,9 @@ with tab2:
             st.warning("Fill all fields")
         elif new_pass != confirm_pass:
             st.error("Passwords do not match")
-        elif get_user_by_username(new_user):
-            st.error("Username exists")
         else:
-            hashed_pw = bcrypt.hashpw(new_pass.encode(), bcrypt.gensalt())
-            insert_user(new_user, hashed_pw)
-            st.success("Account created! Go to Login tab")
\ No newline at end of file
+            created, message = register_user(new_user, new_pass)
+            if created:
+                st.success("Account created! Go to Login tab")
+            else:
+                st.error(message)
\ No newline at end of file
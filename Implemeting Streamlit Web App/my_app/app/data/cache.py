@@ -0,0 +1,136 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from app.data.changes import changed_tables_since, latest_seq, refresh_frame
+
+# Upper bound on the memory held by cached results
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Streamlit runs every session in this one process, so a write made in any
+# session bumps the version seen by all of them. Writes made by another
+# process (a separate server, a script) are picked up from change_log by
+# sync(), which get_reader() runs.
+_lock = threading.Lock()
+_versions = {}
+_synced_seq = None
+_entries = OrderedDict()  # key -> (DataFrame, size in bytes), least recently used first
+_bytes = 0
+# Whole tables kept current from change_log: table -> (frame, seq it is current to)
+_frames = {}
+_frames_lock = threading.Lock()
+hits = 0
+misses = 0
+
+
+def _size_of(df):
+    return int(df.memory_usage(index=True, deep=True).sum()) + sys.getsizeof(df)
+
+
+def _drop(key):
+    global _bytes
+    _, size = _entries.pop(key)
+    _bytes -= size
+
+
+def bump(*tables):
+    """Mark tables as changed; call after a write has been committed."""
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+        # Entries of older versions can never be hit again, so free them now
+        for key in [k for k in _entries if any(t in tables for t, _ in k[2])]:
+            _drop(key)
+
+
+def sync(conn):
+    """Bump every table written to since the last sync, by any process."""
+    global _synced_seq
+    with _lock:
+        seq = _synced_seq
+    if seq is None:
+        # First sync in this process; start from the newest change
+        tables, latest = None, latest_seq(conn)
+    else:
+        tables, latest = changed_tables_since(conn, seq)
+    if tables is None:
+        # First sync, or the log was pruned past us: nothing cached can be trusted
+        clear()
+    elif tables:
+        bump(*tables)
+        # Whole-table frames take the changed rows instead of being dropped
+        for table in tables:
+            if table in _frames:
+                _refresh_table(conn, table)
+    with _lock:
+        if _synced_seq is None or latest > _synced_seq:
+            _synced_seq = latest
+
+
+def _refresh_table(conn, table):
+    # One refresh at a time, since refresh_frame() updates the frame in place
+    with _frames_lock:
+        frame, seq = _frames.get(table, (None, 0))
+        frame, seq = refresh_frame(conn, table, frame, seq)
+        _frames[table] = (frame, seq)
+        return frame.copy()
+
+
+def read_table_cached(conn, table):
+    """All of table as a DataFrame indexed by id, kept current from change_log.
+
+    The table is read once; after that only rows inserted, updated or
+    deleted since are looked up again by id, so one status update costs
+    one indexed read however big the table is. Each call gets its own copy.
+    """
+    return _refresh_table(conn, table)
+
+
+def read_sql_cached(query, conn, tables, params=None):
+    """pd.read_sql_query, memoized until one of tables is written to.
+
+    tables must list every table the query reads. Each call gets its own
+    copy of the DataFrame, so callers can change it freely.
+    """
+    global _bytes, hits, misses
+    params = tuple(params) if params else ()
+    with _lock:
+        key = (query, params, tuple((t, _versions.get(t, 0)) for t in tables))
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+            hits += 1
+            return entry[0].copy()
+        misses += 1
+
+    # Run the query outside the lock; a write committed meanwhile bumps the
+    # version, so this result is stored under a key nobody asks for again
+    df = pd.read_sql_query(query, conn, params=params or None)
+    size = _size_of(df)
+    if size > MAX_CACHE_BYTES:
+        return df
+
+    with _lock:
+        if key in _entries:
+            _drop(key)
+        _entries[key] = (df, size)
+        _bytes += size
+        while _bytes > MAX_CACHE_BYTES:
+            _drop(next(iter(_entries)))
+    return df.copy()
+
+
+def clear():
+    global _bytes
+    with _lock:
+        _entries.clear()
+        _bytes = 0
+    with _frames_lock:
+        _frames.clear()
+
+
+def stats():
+    with _lock:
+        return {"entries": len(_entries), "bytes": _bytes, "hits": hits, "misses": misses}
@@ -0,0 +1,138 @@
+import pandas as pd
+
+# Rows of change_log kept by prune_changes(); readers further behind reload
+CHANGE_LOG_ROWS = 100000
+
+# Ids per "id IN (...)" lookup, under SQLite's default variable limit
+LOOKUP_BATCH = 500
+
+
+def latest_seq(conn):
+    """Sequence number of the newest logged change, 0 if there is none."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+def _bounds(conn):
+    # Separate subqueries, so each is a single seek on the seq b-tree
+    return conn.execute(
+        "SELECT (SELECT MIN(seq) FROM change_log), (SELECT MAX(seq) FROM change_log)"
+    ).fetchone()
+
+
+def changed_tables_since(conn, seq):
+    """Tables written to after seq, as (tables, latest_seq).
+
+    Only the distinct table names are read, never the change rows
+    themselves. tables is None when the log has been pruned past seq.
+    """
+    oldest, latest = _bounds(conn)
+    if latest is None or latest <= seq:
+        return [], max(seq, latest or 0)
+    if seq < oldest - 1:
+        return None, latest
+    rows = conn.execute(
+        "SELECT DISTINCT table_name FROM change_log WHERE seq > ? AND seq <= ?", (seq, latest)
+    ).fetchall()
+    return [row[0] for row in rows], latest
+
+
+def get_changes_since(conn, seq, tables=None):
+    """Changes logged after seq, as (changes, latest_seq).
+
+    changes is a DataFrame of seq, table_name, op ('I', 'U' or 'D') and
+    row_id, oldest first, limited to tables if given. It is None when the
+    log has been pruned past seq; the caller then has to reload in full.
+    Pass latest_seq back in next time.
+    """
+    oldest, latest = _bounds(conn)
+    if latest is None or latest <= seq:
+        return pd.DataFrame(columns=["seq", "table_name", "op", "row_id"]), max(seq, latest or 0)
+    if seq < oldest - 1:
+        return None, latest
+
+    query = "SELECT seq, table_name, op, row_id FROM change_log WHERE seq > ? AND seq <= ?"
+    params = [seq, latest]
+    if tables:
+        query += f" AND table_name IN ({', '.join('?' for _ in tables)})"
+        params.extend(tables)
+    query += " ORDER BY seq"
+    return pd.read_sql_query(query, conn, params=params), latest
+
+
+def read_rows(conn, table, ids):
+    """Current rows of table with the given ids; ids that are gone are left out."""
+    ids = [int(i) for i in ids]
+    frames = []
+    for start in range(0, len(ids), LOOKUP_BATCH):
+        batch = ids[start:start + LOOKUP_BATCH]
+        query = f"SELECT * FROM {table} WHERE id IN ({', '.join('?' for _ in batch)})"
+        frames.append(pd.read_sql_query(query, conn, params=batch))
+    if not frames:
+        return pd.read_sql_query(f"SELECT * FROM {table} WHERE 0", conn)
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def _load_table(conn, table):
+    frame = pd.read_sql_query(f"SELECT * FROM {table} ORDER BY id", conn)
+    # Arrow-backed text columns copy the whole column on every assignment;
+    # object columns let a changed row be written in place
+    text = {name: object for name, dtype in frame.dtypes.items() if pd.api.types.is_string_dtype(dtype)}
+    return frame.astype(text).set_index("id", drop=False).rename_axis(None)
+
+
+def _like(fresh, frame):
+    # An all-NULL column reads back as object; match the frame so concat and
+    # in-place assignment keep its dtypes
+    for name, dtype in frame.dtypes.items():
+        if name in fresh and fresh[name].dtype != dtype:
+            try:
+                fresh[name] = fresh[name].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+    return fresh
+
+
+def refresh_frame(conn, table, frame, seq):
+    """Bring a full copy of table, read at change seq, up to date.
+
+    Only rows inserted, updated or deleted since then are looked up again
+    by id, so refreshing after one status update costs one indexed read
+    whatever the size of the table. Updated rows are written in place;
+    inserts and deletes cost one copy of the frame. Returns (frame,
+    latest_seq), with frame indexed by id. Pass frame=None to load the
+    table for the first time.
+    """
+    if frame is None:
+        # Take latest before reading, so nothing committed in between is
+        # missed; a change picked up twice is harmless
+        latest = latest_seq(conn)
+        return _load_table(conn, table), latest
+    changes, latest = get_changes_since(conn, seq, (table,))
+    if changes is None:
+        return _load_table(conn, table), latest
+    if changes.empty:
+        return frame, latest
+
+    ids = changes["row_id"].unique()
+    fresh = _like(read_rows(conn, table, ids).set_index("id", drop=False).rename_axis(None), frame)
+    positions = frame.index.get_indexer(fresh.index)
+    present = positions >= 0
+    if present.any():
+        for column, name in enumerate(frame.columns):
+            frame.iloc[positions[present], column] = fresh[name].to_numpy()[present]
+    gone = [i for i in ids if i not in fresh.index and i in frame.index]
+    if gone:
+        frame = frame.drop(gone)
+    if not present.all():
+        frame = pd.concat([frame, fresh[~present]])
+        if not frame.index.is_monotonic_increasing:
+            frame = frame.sort_index()
+    return frame, latest
+
+
+def prune_changes(conn, keep=CHANGE_LOG_ROWS):
+    """Drop all but the newest keep rows of change_log; returns rows deleted."""
+    keep = max(keep, 1)  # the newest row marks latest_seq
+    cursor = conn.execute("DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?", (keep,))
+    conn.commit()
+    return cursor.rowcount
@@ -1,4 +1,7 @@
 import pandas as pd
+from app.data.cache import bump, read_sql_cached, read_table_cached
+from app.data.ingest import TABLES, frame_to_rows, insert_sql
+from app.data.pagination import Page, fetch_page
 
 def insert_dataset(conn, dataset_name, category=None, source=None, last_updated=None, record_count=None, file_size_mb=None):
     try:
@@ -19,6 +22,7 @@ def insert_dataset(conn, dataset_name, category=None, source=None, last_updated=
         ))
 
         conn.commit()
+        bump("datasets_metadata")
         return cursor.lastrowid
     except Exception as e:
         print(f"Error inserting dataset: {e}")
@@ -27,12 +31,33 @@ def insert_dataset(conn, dataset_name, category=None, source=None, last_updated=
 
 def get_all_datasets(conn):
     try:
-        return pd.read_sql_query("SELECT * FROM datasets_metadata", conn)
+        return read_table_cached(conn, "datasets_metadata").reset_index(drop=True)
     except Exception as e:
         print(f"Error fetching datasets: {e}")
         return pd.DataFrame()
 
 
+# Columns get_datasets_page() may sort and filter on
+DATASET_SORT_COLUMNS = ("id", "created_at")
+DATASET_FILTER_COLUMNS = ("category", "source")
+
+
+def get_datasets_page(conn, after=None, limit=50, sort="id", descending=True,
+                      category=None, source=None):
+    """One page of datasets, newest first by default.
+
+    Pass the returned page's next_cursor as `after` to get the next one.
+    Filters left as None are not applied.
+    """
+    try:
+        filters = {"category": category, "source": source}
+        return fetch_page(conn, "datasets_metadata", DATASET_SORT_COLUMNS, DATASET_FILTER_COLUMNS,
+                          sort, descending, filters, after, limit)
+    except Exception as e:
+        print(f"Error fetching datasets page: {e}")
+        return Page(pd.DataFrame(), None, 0, True)
+
+
 def update_dataset_count(conn, dataset_id, new_count):
     try:
         cursor = conn.cursor()
@@ -41,6 +66,7 @@ def update_dataset_count(conn, dataset_id, new_count):
             (new_count, dataset_id)
         )
         conn.commit()
+        bump("datasets_metadata")
         return cursor.rowcount
     except Exception as e:
         print(f"Error updating dataset: {e}")
@@ -55,6 +81,7 @@ def delete_dataset(conn, dataset_id):
             (dataset_id,)
         )
         conn.commit()
+        bump("datasets_metadata")
         return cursor.rowcount
     except Exception as e:
         print(f"Error deleting dataset: {e}")
@@ -68,7 +95,7 @@ def get_dataset_count_by_category(conn):
     GROUP BY category
     ORDER BY count DESC
     """
-    return pd.read_sql_query(query, conn)
+    return read_sql_cached(query, conn, ("datasets_metadata",))
 
 
 def get_large_datasets(conn, min_size=100):
@@ -78,30 +105,14 @@ def get_large_datasets(conn, min_size=100):
     WHERE file_size_mb > ?
     ORDER BY file_size_mb DESC
     """
-    return pd.read_sql_query(query, conn, params=(min_size,))
+    return read_sql_cached(query, conn, ("datasets_metadata",), params=(min_size,))
 
 
 def insert_dataset_from_df(conn, df):
+    # Column-wise tuples and one executemany instead of an execute per iterrows() row
+    columns = list(TABLES["datasets_metadata"]["columns"])
     cursor = conn.cursor()
-    count = 0
-
-    for _, row in df.iterrows():
-        cursor.execute(
-            """
-            INSERT OR IGNORE INTO datasets_metadata
-            (dataset_name, category, source, last_updated, record_count, file_size_mb)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (
-                row["dataset_name"],
-                row.get("category", None),
-                row.get("source", None),
-                row.get("last_updated", None),
-                row.get("record_count", None),
-                row.get("file_size_mb", None)
-            )
-        )
-        count += 1
-
+    cursor.executemany(insert_sql("datasets_metadata", columns), frame_to_rows(df, columns))
     conn.commit()
-    return count
\ No newline at end of file
+    bump("datasets_metadata")
+    return len(df)
@@ -1,8 +1,188 @@
+import atexit
+import contextlib
+import queue
 import sqlite3
+import threading
+import time
 from pathlib import Path
+
+from app.data.cache import sync
+from app.data.migrations import migrate
+
 DB_PATH = Path("DATA") / "intelligence_platform.db"
 
+# Applied to every pooled connection. WAL lets readers keep reading while a
+# writer commits; NORMAL sync is still crash-safe in WAL mode.
+PRAGMAS = {
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative = KiB, so 64 MB
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+
+# Most read-only connections open at once; further readers wait for one
+MAX_READERS = 8
+# Seconds a reader waits for a free connection before giving up
+CHECKOUT_TIMEOUT = 30
+
+
 def connect_database(db_path=DB_PATH):
+    """Plain unpooled connection, for scripts that manage their own."""
     return sqlite3.connect(str(db_path))
 
 
+class ConnectionPool:
+    """Bounded pool of read-only connections plus one shared writer.
+
+    Streamlit runs every rerun of a page on a new thread, so connections
+    kept per thread would be reopened, PRAGMAs and all, on every
+    interaction. Instead at most max_readers read-only connections are
+    opened, once, and handed out through a queue: reader() checks one out
+    to the calling thread, and it goes back when the thread calls
+    release() or has finished. The one writable connection is shared by
+    every session; writing() holds it exclusively for a with block, so
+    one session can't commit or roll back another's transaction.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_readers=MAX_READERS, timeout=CHECKOUT_TIMEOUT):
+        self.db_path = Path(db_path)
+        self.max_readers = max_readers
+        self.timeout = timeout
+        # Last in, first out, so the connection with the warmest cache goes first
+        self._idle = queue.LifoQueue()
+        self._leases = {}  # thread -> reader checked out to it
+        self._opened = 0
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _open(self, read_only):
+        if read_only:
+            uri = f"file:{self.db_path.resolve()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        for name, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _reclaim(self):
+        # Call with the lock held; readers of finished threads go back to the queue
+        for thread in [t for t in self._leases if not t.is_alive()]:
+            self._idle.put(self._leases.pop(thread))
+
+    def _ensure_ready(self):
+        # journal_mode is stored in the database file, so this and the
+        # schema migrations run once per process, before any pooled handle
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                conn = sqlite3.connect(str(self.db_path))
+                conn.execute("PRAGMA journal_mode = WAL")
+                migrate(conn)
+                conn.close()
+                self._ready = True
+
+    def reader(self):
+        """Read-only connection checked out to the calling thread."""
+        thread = threading.current_thread()
+        conn = self._leases.get(thread)
+        if conn is not None:
+            return conn
+
+        self._ensure_ready()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._lock:
+                self._reclaim()
+                if self._idle.empty() and self._opened < self.max_readers:
+                    self._idle.put(self._open(read_only=True))
+                    self._opened += 1
+            try:
+                # Short waits, so readers of threads that finish meanwhile are reclaimed
+                conn = self._idle.get(timeout=min(0.1, max(0.0, deadline - time.monotonic())))
+                break
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    raise sqlite3.OperationalError(
+                        f"all {self.max_readers} reader connections are in use")
+        with self._lock:
+            self._leases[thread] = conn
+        return conn
+
+    def release(self):
+        """Return the calling thread's reader to the pool before the thread ends."""
+        with self._lock:
+            conn = self._leases.pop(threading.current_thread(), None)
+        if conn is not None:
+            self._idle.put(conn)
+
+    @contextlib.contextmanager
+    def reading(self):
+        """A reader for one with block, returned afterwards unless the thread already had one."""
+        held = threading.current_thread() in self._leases
+        try:
+            yield self.reader()
+        finally:
+            if not held:
+                self.release()
+
+    @contextlib.contextmanager
+    def writing(self):
+        """The shared writable connection, held exclusively for one with block.
+
+        Whatever the block leaves uncommitted is committed at the end, or
+        rolled back if it raised.
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._ensure_ready()
+                self._writer = self._open(read_only=False)
+            conn = self._writer
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def close_all(self):
+        with self._write_lock, self._lock:
+            while not self._idle.empty():
+                self._idle.get_nowait().close()
+            for conn in self._leases.values():
+                conn.close()
+            self._leases.clear()
+            self._opened = 0
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+pool = ConnectionPool()
+atexit.register(pool.close_all)
+
+
+def get_reader():
+    """Pooled read-only connection; use for SELECTs.
+
+    It stays checked out to the calling thread until the thread finishes
+    (one Streamlit script run). Also drops cached query results for tables
+    changed since the last call, including by other processes.
+    """
+    conn = pool.reader()
+    sync(conn)
+    return conn
+
+
+def get_writer():
+    """The shared writable connection, for a with block; use for INSERT/UPDATE/DELETE.
+
+        with get_writer() as conn:
+            insert_incident(conn, ...)
+    """
+    return pool.writing()
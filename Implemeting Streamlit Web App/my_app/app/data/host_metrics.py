@@ -0,0 +1,60 @@
+import pandas as pd
+
+# Resolutions kept in host_metrics, in seconds per point
+MINUTE = 60
+HOUR = 3600
+# How long each resolution is kept before prune() drops it
+RETENTION = {MINUTE: 7 * 24 * 3600, HOUR: 365 * 24 * 3600}
+
+COLUMNS = ["cpu_pct", "mem_used_mb", "mem_total_mb", "net_rx_bps", "net_tx_bps",
+           "disk_used_gb", "disk_total_gb"]
+
+
+def insert_points(conn, resolution, rows):
+    """Store (ts, *COLUMNS) rows; a point already stored for ts is replaced."""
+    conn.executemany(
+        f"INSERT OR REPLACE INTO host_metrics (resolution, ts, {', '.join(COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in range(len(COLUMNS) + 2))})",
+        [(resolution, *row) for row in rows]
+    )
+    conn.commit()
+
+
+def roll_up(conn, start, end, source=MINUTE, target=HOUR):
+    """Average the source points in [start, end) into target-sized points."""
+    averages = ", ".join(f"AVG({column})" for column in COLUMNS)
+    conn.execute(f"""
+        INSERT OR REPLACE INTO host_metrics (resolution, ts, {', '.join(COLUMNS)})
+        SELECT ?, ts / ? * ?, {averages}
+        FROM host_metrics
+        WHERE resolution = ? AND ts >= ? AND ts < ?
+        GROUP BY ts / ?
+    """, (target, target, target, source, start, end, target))
+    conn.commit()
+
+
+def latest_ts(conn, resolution):
+    return conn.execute("SELECT MAX(ts) FROM host_metrics WHERE resolution = ?", (resolution,)).fetchone()[0]
+
+
+def prune(conn, now):
+    for resolution, keep in RETENTION.items():
+        conn.execute("DELETE FROM host_metrics WHERE resolution = ? AND ts < ?", (resolution, now - keep))
+    conn.commit()
+
+
+def get_series(conn, resolution=MINUTE, since=0):
+    """Points of one resolution from since (unix seconds) on, indexed by time."""
+    query = f"""
+    SELECT ts, {', '.join(COLUMNS)}
+    FROM host_metrics
+    WHERE resolution = ? AND ts >= ?
+    ORDER BY ts
+    """
+    try:
+        df = pd.read_sql_query(query, conn, params=(resolution, int(since)))
+    except Exception as e:
+        print(f"Error fetching host metrics: {e}")
+        return pd.DataFrame(columns=COLUMNS)
+    df.index = pd.to_datetime(df.pop("ts"), unit="s")
+    return df
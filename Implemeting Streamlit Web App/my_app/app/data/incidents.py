@@ -1,4 +1,7 @@
 import pandas as pd
+from app.data.cache import bump, read_sql_cached, read_table_cached
+from app.data.ingest import TABLES, frame_to_rows, insert_sql
+from app.data.pagination import Page, fetch_page
 
 def insert_incident(conn, date, incident_type, severity, status, description, reported_by=None):
     try:
@@ -12,6 +15,7 @@ def insert_incident(conn, date, incident_type, severity, status, description, re
 
         cursor.execute(query, (date, incident_type, severity, status, description, reported_by))
         conn.commit()
+        bump("cyber_incidents")
         return cursor.lastrowid
 
     except Exception as e:
@@ -21,12 +25,45 @@ def insert_incident(conn, date, incident_type, severity, status, description, re
 
 def get_all_incidents(conn):
     try:
-        return pd.read_sql_query("SELECT * FROM cyber_incidents", conn)
+        return read_table_cached(conn, "cyber_incidents").reset_index(drop=True)
     except Exception as e:
         print(f"Error retrieving incidents: {e}")
         return pd.DataFrame()
 
 
+# Columns get_incidents_page() may sort and filter on
+INCIDENT_SORT_COLUMNS = ("id", "created_at")
+INCIDENT_FILTER_COLUMNS = ("severity", "status", "incident_type", "reported_by")
+
+
+def get_incidents_page(conn, after=None, limit=50, sort="id", descending=True,
+                      severity=None, status=None, incident_type=None, reported_by=None):
+    """One page of incidents, newest first by default.
+
+    Pass the returned page's next_cursor as `after` to get the next one.
+    Filters left as None are not applied.
+    """
+    try:
+        filters = {"severity": severity, "status": status, "incident_type": incident_type, "reported_by": reported_by}
+        return fetch_page(conn, "cyber_incidents", INCIDENT_SORT_COLUMNS, INCIDENT_FILTER_COLUMNS,
+                          sort, descending, filters, after, limit)
+    except Exception as e:
+        print(f"Error retrieving incidents page: {e}")
+        return Page(pd.DataFrame(), None, 0, True)
+
+
+def get_incident_statuses(conn):
+    # Answered from idx_incidents_status, so every status in the table shows up
+    query = "SELECT DISTINCT status FROM cyber_incidents WHERE status IS NOT NULL ORDER BY status"
+    return read_sql_cached(query, conn, ("cyber_incidents",))["status"].tolist()
+
+
+def get_incident(conn, incident_id):
+    """One incident by id as a one-row DataFrame, empty if there is none."""
+    query = "SELECT * FROM cyber_incidents WHERE id = ?"
+    return read_sql_cached(query, conn, ("cyber_incidents",), params=(int(incident_id),))
+
+
 def update_incident_status(conn, incident_id, new_status):
     try:
         cursor = conn.cursor()
@@ -35,6 +72,7 @@ def update_incident_status(conn, incident_id, new_status):
             (new_status, incident_id)
         )
         conn.commit()
+        bump("cyber_incidents")
         return cursor.rowcount
     except Exception as e:
         print(f"Error updating incident: {e}")
@@ -49,6 +87,7 @@ def delete_incident(conn, incident_id):
             (incident_id,)
         )
         conn.commit()
+        bump("cyber_incidents")
         return cursor.rowcount
     except Exception as e:
         print(f"Error deleting incident: {e}")
@@ -66,7 +105,7 @@ def get_incidents_by_type_count(conn):
     GROUP BY incident_type
     ORDER BY count DESC
     """
-    return pd.read_sql_query(query, conn)
+    return read_sql_cached(query, conn, ("cyber_incidents",))
 
 
 def get_high_severity_by_status(conn):
@@ -77,7 +116,8 @@ def get_high_severity_by_status(conn):
     GROUP BY status
     ORDER BY count DESC
     """
-    return pd.read_sql_query(query, conn)
+    return read_sql_cached(query, conn, ("cyber_incidents",))
+
 
 def get_incident_types_with_many_cases(conn, min_count=5):
     query = """
@@ -87,30 +127,14 @@ def get_incident_types_with_many_cases(conn, min_count=5):
     HAVING COUNT(*) > ?
     ORDER BY count DESC
     """
-    return pd.read_sql_query(query, conn, params=(min_count,))
+    return read_sql_cached(query, conn, ("cyber_incidents",), params=(min_count,))
 
 
 def insert_incident_from_df(conn, df):
+    # Column-wise tuples and one executemany instead of an execute per iterrows() row
+    columns = list(TABLES["cyber_incidents"]["columns"])
     cursor = conn.cursor()
-    count = 0
-
-    for _, row in df.iterrows():
-        cursor.execute(
-            """
-            INSERT OR IGNORE INTO cyber_incidents
-            (date, incident_type, severity, status, description, reported_by)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (
-                row["date"],
-                row["incident_type"],
-                row["severity"],
-                row["status"],
-                row["description"],
-                row.get("reported_by", None)
-            )
-        )
-        count += 1
-
+    cursor.executemany(insert_sql("cyber_incidents", columns), frame_to_rows(df, columns))
     conn.commit()
-    return count
+    bump("cyber_incidents")
+    return len(df)
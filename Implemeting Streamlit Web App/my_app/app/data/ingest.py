@@ -0,0 +1,178 @@
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from app.data.cache import bump
+from app.data.changes import prune_changes
+
+# Columns each table takes from its CSV, with the dtype to parse them as.
+# Text stays as plain str objects, which sqlite3 binds without conversion;
+# Int64 is nullable, so an empty cell doesn't turn the counts into floats.
+TABLES = {
+    "cyber_incidents": {
+        "file": "cyber_incidents.csv",
+        "columns": {
+            "date": "object",
+            "incident_type": "object",
+            "severity": "object",
+            "status": "object",
+            "description": "object",
+            "reported_by": "object",
+        },
+    },
+    "it_tickets": {
+        "file": "it_tickets.csv",
+        "columns": {
+            "ticket_id": "object",
+            "priority": "object",
+            "status": "object",
+            "category": "object",
+            "subject": "object",
+            "description": "object",
+            "created_date": "object",
+            "resolved_date": "object",
+            "assigned_to": "object",
+        },
+    },
+    "datasets_metadata": {
+        "file": "datasets_metadata.csv",
+        "columns": {
+            "dataset_name": "object",
+            "category": "object",
+            "source": "object",
+            "last_updated": "object",
+            "record_count": "Int64",
+            "file_size_mb": "float64",
+        },
+    },
+}
+
+# Rows parsed per chunk, and committed per transaction
+CHUNK_ROWS = 100000
+ROWS_PER_TRANSACTION = 500000
+# Parsed chunks waiting for the writer; bounds memory if parsing outruns SQLite
+MAX_QUEUED_CHUNKS = 4
+
+
+def insert_sql(table, columns):
+    placeholders = ", ".join("?" for _ in columns)
+    return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+def frame_to_rows(df, columns):
+    """Parameter tuples for executemany, built a column at a time.
+
+    Missing columns become NULL, as do NA/NaN cells, since sqlite3 can't
+    bind pandas' missing-value markers.
+    """
+    values = []
+    for name in columns:
+        if name not in df:
+            values.append([None] * len(df))
+            continue
+        values.append(df[name].to_numpy(dtype=object, na_value=None).tolist())
+    return list(zip(*values))
+
+
+def _parse(table, path, out, chunk_rows, stop):
+    # Producer: one thread per source file. The C parser drops the GIL while
+    # tokenizing, so several files parse in parallel with the writer.
+    spec = TABLES[table]
+    try:
+        header = pd.read_csv(path, nrows=0).columns
+        dtypes = {name: dtype for name, dtype in spec["columns"].items() if name in header}
+        for chunk in pd.read_csv(path, usecols=list(dtypes), dtype=dtypes, chunksize=chunk_rows):
+            if stop.is_set():
+                return
+            out.put((table, frame_to_rows(chunk, list(spec["columns"]))))
+    except Exception as e:
+        out.put((table, e))
+    finally:
+        out.put((table, None))
+
+
+def ingest_files(conn, sources, chunk_rows=CHUNK_ROWS, rows_per_transaction=ROWS_PER_TRANSACTION):
+    """Load CSVs into their tables; sources is a list of (table, csv_path).
+
+    Files are parsed concurrently, one thread each, while this thread is
+    the only one writing to SQLite. Rows go in with executemany() and are
+    committed every rows_per_transaction rows. Returns rows read per table.
+    """
+    chunks = queue.Queue(maxsize=MAX_QUEUED_CHUNKS)
+    stop = threading.Event()
+    parsers = [threading.Thread(target=_parse, args=(table, path, chunks, chunk_rows, stop), daemon=True)
+               for table, path in sources]
+    for parser in parsers:
+        parser.start()
+
+    counts = {table: 0 for table, _ in sources}
+    statements = {table: insert_sql(table, list(TABLES[table]["columns"])) for table in counts}
+    pending = 0
+    running = len(parsers)
+    cursor = conn.cursor()
+    try:
+        while running:
+            table, rows = chunks.get()
+            if rows is None:
+                running -= 1
+                continue
+            if isinstance(rows, Exception):
+                print(f"Error reading {table} CSV: {rows}")
+                continue
+            cursor.executemany(statements[table], rows)
+            counts[table] += len(rows)
+            pending += len(rows)
+            if pending >= rows_per_transaction:
+                conn.commit()
+                pending = 0
+        conn.commit()
+        # A bulk load logs a change per row; sessions that fall behind the
+        # kept part of the log just reload
+        prune_changes(conn)
+    except BaseException:
+        conn.rollback()
+        # Unblock parsers stuck on a full queue so their threads can exit
+        stop.set()
+        while any(parser.is_alive() for parser in parsers):
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise
+    finally:
+        bump(*counts)
+    return counts
+
+
+def ingest_data_dir(conn, data_dir="DATA", tables=None):
+    """Load each table's CSV from data_dir, skipping any that are missing."""
+    sources = []
+    for table in tables or TABLES:
+        path = Path(data_dir) / TABLES[table]["file"]
+        if path.exists():
+            sources.append((table, path))
+        else:
+            print(f"⚠️  File not found: {path}")
+    return ingest_files(conn, sources)
+
+
+def main():
+    from app.data.db import get_writer
+
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else "DATA"
+    start = time.perf_counter()
+    with get_writer() as conn:
+        counts = ingest_data_dir(conn, data_dir)
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    for table, count in counts.items():
+        print(f"✅ {table}: {count:,} rows")
+    print(f"{total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
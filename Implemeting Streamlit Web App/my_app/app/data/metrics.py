@@ -0,0 +1,79 @@
+import pandas as pd
+from app.data.cache import read_sql_cached
+
+# Statuses and severities the headline numbers are built from
+OPEN_STATUS = "Open"
+VULNERABILITY_SEVERITIES = ("High", "Critical")
+
+
+def get_counts(conn, table):
+    """Every summary count kept for table, as {dimension: Series of value -> count}.
+
+    One primary-key range read of metric_counts, which the triggers added in
+    migration 3 keep current, so the cost doesn't grow with the table. The
+    "total" dimension holds the row count under the value ''.
+    """
+    query = """
+    SELECT dimension, value, count
+    FROM metric_counts
+    WHERE table_name = ? AND count > 0
+    """
+    try:
+        # metric_counts only changes when table does, so table's version keys the cache
+        df = read_sql_cached(query, conn, (table,), params=(table,))
+    except Exception as e:
+        print(f"Error fetching {table} metrics: {e}")
+        return {}
+    counts = {}
+    for dimension, group in df.groupby("dimension"):
+        counts[dimension] = group.set_index("value")["count"].sort_values(ascending=False)
+    return counts
+
+
+def _total(counts):
+    total = counts.get("total")
+    return int(total.sum()) if total is not None else 0
+
+
+def _distribution(counts, dimension):
+    series = counts.get(dimension, pd.Series(dtype="int64"))
+    return series.rename_axis(dimension).rename("count")
+
+
+def _count_of(counts, dimension, *values):
+    series = counts.get(dimension)
+    if series is None:
+        return 0
+    return int(series[series.index.isin(values)].sum())
+
+
+def get_incident_metrics(conn):
+    counts = get_counts(conn, "cyber_incidents")
+    return {
+        "total": _total(counts),
+        "threats_detected": _count_of(counts, "status", OPEN_STATUS),
+        "vulnerabilities": _count_of(counts, "severity", *VULNERABILITY_SEVERITIES),
+        "by_type": _distribution(counts, "incident_type"),
+        "by_severity": _distribution(counts, "severity"),
+        "by_status": _distribution(counts, "status"),
+    }
+
+
+def get_ticket_metrics(conn):
+    counts = get_counts(conn, "it_tickets")
+    return {
+        "total": _total(counts),
+        "open": _count_of(counts, "status", OPEN_STATUS),
+        "by_status": _distribution(counts, "status"),
+        "by_priority": _distribution(counts, "priority"),
+        "by_category": _distribution(counts, "category"),
+    }
+
+
+def get_dataset_metrics(conn):
+    counts = get_counts(conn, "datasets_metadata")
+    return {
+        "total": _total(counts),
+        "by_category": _distribution(counts, "category"),
+        "by_source": _distribution(counts, "source"),
+    }
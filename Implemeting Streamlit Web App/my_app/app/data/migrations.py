@@ -0,0 +1,390 @@
+import sqlite3
+import sys
+
+from app.data.schema import (create_users_table, create_cyber_incidents_table,
+                             create_datasets_metadata_table, create_it_tickets_table)
+
+
+def _create_tables(conn):
+    # The original schema. Every statement is IF NOT EXISTS, so databases
+    # created before migrations existed pass through unchanged. The
+    # create_* helpers commit on their own, which makes this the one step
+    # that isn't atomic with its version bump; re-running it is harmless.
+    create_users_table(conn)
+    create_cyber_incidents_table(conn)
+    create_datasets_metadata_table(conn)
+    create_it_tickets_table(conn)
+
+
+QUERY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_incidents_type ON cyber_incidents (incident_type)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_severity_status ON cyber_incidents (severity, status)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_severity ON cyber_incidents (severity)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_status ON cyber_incidents (status)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_reported_by ON cyber_incidents (reported_by)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_created_at ON cyber_incidents (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_priority_created_at ON it_tickets (priority, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_status ON it_tickets (status)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_category ON it_tickets (category)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_assigned_to ON it_tickets (assigned_to)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON it_tickets (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_datasets_category ON datasets_metadata (category)",
+    "CREATE INDEX IF NOT EXISTS idx_datasets_source ON datasets_metadata (source)",
+    "CREATE INDEX IF NOT EXISTS idx_datasets_file_size ON datasets_metadata (file_size_mb)",
+    "CREATE INDEX IF NOT EXISTS idx_datasets_created_at ON datasets_metadata (created_at)",
+]
+
+
+def _add_query_indexes(conn):
+    # One index per hot query shape in incidents.py, tickets.py and datasets.py.
+    # SQLite appends the rowid to every index, so a single-column index also
+    # serves "WHERE col = ? ORDER BY id" pages without a sort; that's why
+    # severity has one next to the (severity, status) one the GROUP BYs use.
+    for statement in QUERY_INDEXES:
+        conn.execute(statement)
+
+
+def _summary_triggers(table, columns):
+    # Keep metric_counts in step with table: one row per (column, value) plus
+    # a "total" row, adjusted by the row being written. NULL is counted as ''
+    # because NULLs never conflict in a primary key.
+    def add(column, ref):
+        value = f"COALESCE({ref}.{column}, '')" if column else "''"
+        return (f"INSERT INTO metric_counts (table_name, dimension, value, count) "
+                f"VALUES ('{table}', '{column or 'total'}', {value}, 1) "
+                f"ON CONFLICT (table_name, dimension, value) DO UPDATE SET count = count + 1;")
+
+    def remove(column, ref):
+        value = f"COALESCE({ref}.{column}, '')" if column else "''"
+        return (f"UPDATE metric_counts SET count = count - 1 WHERE table_name = '{table}' "
+                f"AND dimension = '{column or 'total'}' AND value = {value};")
+
+    dimensions = [None] + list(columns)
+    statements = [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_counts_insert AFTER INSERT ON {table} BEGIN "
+        + " ".join(add(column, "NEW") for column in dimensions) + " END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_counts_delete AFTER DELETE ON {table} BEGIN "
+        + " ".join(remove(column, "OLD") for column in dimensions) + " END",
+    ]
+    # One update trigger per column, so changing a status touches only the
+    # two status rows
+    for column in columns:
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_counts_update_{column} "
+            f"AFTER UPDATE OF {column} ON {table} WHEN OLD.{column} IS NOT NEW.{column} BEGIN "
+            f"{remove(column, 'OLD')} {add(column, 'NEW')} END")
+    return statements
+
+
+def _add_metric_counts(conn):
+    # Summary counts behind app/data/metrics.py. The column lists are spelled
+    # out here rather than shared, so this migration stays as it shipped;
+    # counting another column means a new migration.
+    summarized = {
+        "cyber_incidents": ["incident_type", "severity", "status"],
+        "it_tickets": ["status", "priority", "category"],
+        "datasets_metadata": ["category", "source"],
+    }
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS metric_counts (
+            table_name TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (table_name, dimension, value)
+        ) WITHOUT ROWID
+    """)
+    for table, columns in summarized.items():
+        # Backfill from the rows already there, inside the same transaction
+        # as the triggers, so no write slips in between
+        conn.execute(f"INSERT INTO metric_counts SELECT '{table}', 'total', '', COUNT(*) FROM {table}")
+        for column in columns:
+            conn.execute(f"INSERT INTO metric_counts SELECT '{table}', '{column}', COALESCE({column}, ''), "
+                         f"COUNT(*) FROM {table} GROUP BY 3")
+        for statement in _summary_triggers(table, columns):
+            conn.execute(statement)
+
+
+def _add_change_log(conn):
+    # One row per write to the data tables, in commit order. AUTOINCREMENT
+    # keeps seq from being reused once old rows are pruned, so a reader's
+    # "changes since seq" can never silently skip anything.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL,
+            row_id INTEGER NOT NULL
+        )
+    """)
+    for table in ["cyber_incidents", "it_tickets", "datasets_metadata"]:
+        for event, op, ref in [("INSERT", "I", "NEW"), ("UPDATE", "U", "NEW"), ("DELETE", "D", "OLD")]:
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_log_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO change_log (table_name, op, row_id) VALUES ('{table}', '{op}', {ref}.id);
+                END
+            """)
+
+
+def _add_import_checkpoints(conn):
+    # How far migrate_users_from_file() got through each users.txt export,
+    # committed with each batch so a failed run can resume
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source TEXT PRIMARY KEY,
+            byte_offset INTEGER NOT NULL,
+            lines INTEGER NOT NULL,
+            inserted INTEGER NOT NULL,
+            existing INTEGER NOT NULL,
+            invalid INTEGER NOT NULL,
+            updated_at TIMESTAMP
+        )
+    """)
+
+
+# Period each incident is counted under, per grain. Weeks start on Monday;
+# hour_of_day buckets by the hour the incident was recorded, since the
+# incident's own date has no time. Rows whose date doesn't parse get NULL
+# and aren't counted. The triggers are built from this once, by migration
+# 6; changing it needs a new migration that recreates them.
+INCIDENT_ROLLUP_PERIODS = {
+    "day": "date({ref}date)",
+    "week": "date({ref}date, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m', {ref}date)",
+    "hour_of_day": "strftime('%H', {ref}created_at)",
+}
+
+
+def backfill_incident_rollups(conn):
+    """Recount incident_rollups from cyber_incidents, one GROUP BY per grain."""
+    conn.execute("DELETE FROM incident_rollups")
+    for grain, period in INCIDENT_ROLLUP_PERIODS.items():
+        period = period.format(ref="")
+        conn.execute(f"""
+            INSERT INTO incident_rollups (grain, period, incident_type, severity, count)
+            SELECT '{grain}', {period}, COALESCE(incident_type, ''), COALESCE(severity, ''), COUNT(*)
+            FROM cyber_incidents
+            WHERE {period} IS NOT NULL
+            GROUP BY 2, 3, 4
+        """)
+
+
+def _incident_rollup_triggers():
+    def add(ref):
+        return " ".join(
+            f"INSERT INTO incident_rollups (grain, period, incident_type, severity, count) "
+            f"SELECT '{grain}', {period.format(ref=ref + '.')}, COALESCE({ref}.incident_type, ''), "
+            f"COALESCE({ref}.severity, ''), 1 WHERE {period.format(ref=ref + '.')} IS NOT NULL "
+            f"ON CONFLICT (grain, period, incident_type, severity) DO UPDATE SET count = count + 1;"
+            for grain, period in INCIDENT_ROLLUP_PERIODS.items())
+
+    def remove(ref):
+        return " ".join(
+            f"UPDATE incident_rollups SET count = count - 1 WHERE grain = '{grain}' "
+            f"AND period = {period.format(ref=ref + '.')} AND incident_type = COALESCE({ref}.incident_type, '') "
+            f"AND severity = COALESCE({ref}.severity, '');"
+            for grain, period in INCIDENT_ROLLUP_PERIODS.items())
+
+    columns = ["date", "created_at", "incident_type", "severity"]
+    changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_cyber_incidents_rollups_insert AFTER INSERT ON cyber_incidents "
+        f"BEGIN {add('NEW')} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_cyber_incidents_rollups_delete AFTER DELETE ON cyber_incidents "
+        f"BEGIN {remove('OLD')} END",
+        # Status changes, the common update, don't touch the rollups at all
+        f"CREATE TRIGGER IF NOT EXISTS trg_cyber_incidents_rollups_update "
+        f"AFTER UPDATE OF {', '.join(columns)} ON cyber_incidents WHEN {changed} "
+        f"BEGIN {remove('OLD')} {add('NEW')} END",
+    ]
+
+
+def _add_incident_rollups(conn):
+    # Incident counts per period x incident_type x severity, read by
+    # app/data/rollups.py. Same scheme as metric_counts: triggers keep it
+    # current, and it is backfilled in the transaction that adds them.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS incident_rollups (
+            grain TEXT NOT NULL,
+            period TEXT NOT NULL,
+            incident_type TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (grain, period, incident_type, severity)
+        ) WITHOUT ROWID
+    """)
+    backfill_incident_rollups(conn)
+    for statement in _incident_rollup_triggers():
+        conn.execute(statement)
+
+
+def _add_host_metrics(conn):
+    # Downsampled host samples from app/services/host_collector.py, one row
+    # per resolution (seconds per point) and start time (unix seconds)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS host_metrics (
+            resolution INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            cpu_pct REAL,
+            mem_used_mb REAL,
+            mem_total_mb REAL,
+            net_rx_bps REAL,
+            net_tx_bps REAL,
+            disk_used_gb REAL,
+            disk_total_gb REAL,
+            PRIMARY KEY (resolution, ts)
+        ) WITHOUT ROWID
+    """)
+
+
+def _add_ticket_sla_index(conn):
+    # Every column app/data/ticket_analytics.py reads, in the order its
+    # GROUP BYs list them, so SQLite streams the groups off this narrow
+    # index with no sort and never touches the subject and description text
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tickets_sla
+        ON it_tickets (status, priority, category, created_date, resolved_date, assigned_to)
+    """)
+
+
+# Applied in order; a database at PRAGMA user_version N has run the first N.
+# Only ever append to this list, never edit or reorder shipped entries.
+MIGRATIONS = [
+    _create_tables,
+    _add_query_indexes,
+    _add_metric_counts,
+    _add_change_log,
+    _add_import_checkpoints,
+    _add_incident_rollups,
+    _add_host_metrics,
+    _add_ticket_sla_index,
+]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Bring the database up to the latest schema; returns how many migrations ran."""
+    applied = 0
+    while True:
+        # IMMEDIATE takes the write lock before reading the version, so two
+        # processes starting together can't both apply the same migration
+        conn.execute("BEGIN IMMEDIATE")
+        version = schema_version(conn)
+        if version >= len(MIGRATIONS):
+            conn.rollback()
+            return applied
+        try:
+            MIGRATIONS[version](conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied migration {version + 1}: {MIGRATIONS[version].__name__.strip('_')}")
+        applied += 1
+
+
+def _exercise_queries(conn):
+    # Run every read query the data modules ship, with each filter and sort
+    # the page APIs accept, so their SQL can be captured
+    from app.data import (cache, changes, datasets, host_metrics, incidents, metrics, rollups,
+                          ticket_analytics, tickets)
+
+    cache.clear()
+    changes.get_changes_since(conn, 0, ("cyber_incidents",))
+    changes.changed_tables_since(conn, 0)
+    changes.read_rows(conn, "cyber_incidents", [1, 2])
+    metrics.get_incident_metrics(conn)
+    metrics.get_ticket_metrics(conn)
+    metrics.get_dataset_metrics(conn)
+    rollups.get_incident_trend(conn, "month")
+    rollups.get_hourly_counts(conn)
+    host_metrics.get_series(conn, host_metrics.MINUTE, since=0)
+    ticket_analytics.get_ticket_sla_report(conn)
+    incidents.get_incidents_by_type_count(conn)
+    incidents.get_high_severity_by_status(conn)
+    incidents.get_incident_types_with_many_cases(conn)
+    incidents.get_incident_statuses(conn)
+    incidents.get_incident(conn, 1)
+    tickets.get_ticket_count_by_status(conn)
+    tickets.get_high_priority_tickets(conn)
+    tickets.get_assigned_ticket_counts(conn)
+    datasets.get_dataset_count_by_category(conn)
+    datasets.get_large_datasets(conn)
+
+    pagers = [
+        (incidents.get_incidents_page, incidents.INCIDENT_SORT_COLUMNS, incidents.INCIDENT_FILTER_COLUMNS),
+        (tickets.get_tickets_page, tickets.TICKET_SORT_COLUMNS, tickets.TICKET_FILTER_COLUMNS),
+        (datasets.get_datasets_page, datasets.DATASET_SORT_COLUMNS, datasets.DATASET_FILTER_COLUMNS),
+    ]
+    for get_page, sort_columns, filter_columns in pagers:
+        for sort in sort_columns:
+            # A cursor makes the keyset predicate part of the plan
+            cursor = ("2024-01-01 00:00:00", 1) if sort == "created_at" else (1, 1)
+            get_page(conn, sort=sort, after=cursor, limit=1)
+            for column in filter_columns:
+                get_page(conn, sort=sort, after=cursor, limit=1, **{column: "x"})
+    cache.clear()
+
+
+def check_query_plans(conn):
+    """Return (sql, plan) for each shipped query that scans a whole table.
+
+    Queries with no WHERE or GROUP BY (SELECT * of a table, the unfiltered
+    first page) read everything or stop at their LIMIT by design and are
+    not reported.
+    """
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        _exercise_queries(conn)
+    finally:
+        conn.set_trace_callback(None)
+
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    problems = []
+    for sql in dict.fromkeys(statements):
+        upper = " ".join(sql.upper().split())
+        if not upper.startswith("SELECT") or (" WHERE " not in upper and " GROUP BY " not in upper):
+            continue
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        # "SCAN t USING [COVERING] INDEX ..." walks an index and "SCAN (subquery-1)"
+        # reads an already-filtered result; only a bare "SCAN t" reads the table
+        if any(step.startswith("SCAN ") and step.split()[1] in tables and " INDEX " not in step
+               for step in plan):
+            problems.append((sql, plan))
+    return problems
+
+
+def main():
+    from app.data.db import DB_PATH
+
+    path = sys.argv[2] if len(sys.argv) > 2 else str(DB_PATH)
+    conn = sqlite3.connect(path)
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+
+    if command == "migrate":
+        applied = migrate(conn)
+        print(f"Schema at version {schema_version(conn)} ({applied} migration(s) applied)")
+    elif command == "check":
+        migrate(conn)
+        problems = check_query_plans(conn)
+        for sql, plan in problems:
+            print(" ".join(sql.split()))
+            for step in plan:
+                print(f"    {step}")
+        print(f"{len(problems)} query plan(s) with a full table scan")
+        conn.close()
+        sys.exit(1 if problems else 0)
+    else:
+        print("Usage: python -m app.data.migrations [migrate|check] [DB_PATH]")
+        sys.exit(2)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from collections import namedtuple
+
+from app.data.cache import read_sql_cached
+
+# rows: DataFrame of at most `limit` rows
+# next_cursor: pass as `after` to get the following page, None on the last page
+# total: row count estimate; exact unless total_exact is False
+Page = namedtuple("Page", ["rows", "next_cursor", "total", "total_exact"])
+
+# Filtered counts stop here, so a broad filter on a huge table stays cheap
+COUNT_CAP = 10000
+
+
+def fetch_page(conn, table, sort_columns, filter_columns, sort="id", descending=True,
+               filters=None, after=None, limit=50):
+    """One page of table by keyset pagination.
+
+    Rows are ordered by (sort, id) and the cursor is that pair for the last
+    row of the page, so the query seeks straight to the next page instead
+    of skipping OFFSET rows. Deep pages cost the same as the first one.
+    """
+    if sort not in sort_columns:
+        raise ValueError(f"Cannot sort {table} by {sort!r}")
+
+    where = []
+    params = []
+    for column, value in (filters or {}).items():
+        if column not in filter_columns:
+            raise ValueError(f"Cannot filter {table} by {column!r}")
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    count_where = list(where)
+    count_params = list(params)
+
+    direction = "DESC" if descending else "ASC"
+    if after is not None:
+        op = "<" if descending else ">"
+        if sort == "id":
+            where.append(f"id {op} ?")
+            params.append(after[1])
+        else:
+            where.append(f"({sort}, id) {op} (?, ?)")
+            params.extend(after)
+
+    query = f"SELECT * FROM {table}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    # id is unique, so it breaks ties and makes the order (and cursor) total
+    if sort == "id":
+        query += f" ORDER BY id {direction} LIMIT ?"
+    else:
+        query += f" ORDER BY {sort} {direction}, id {direction} LIMIT ?"
+    # One extra row tells us whether another page follows
+    params.append(limit + 1)
+
+    rows = read_sql_cached(query, conn, (table,), params=params)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows.iloc[:limit]
+        last = rows.iloc[-1]
+        value = last[sort]
+        # numpy scalars can't be bound as SQL parameters
+        next_cursor = (value.item() if hasattr(value, "item") else value, int(last["id"]))
+
+    total, total_exact = _estimate_total(conn, table, count_where, count_params)
+    return Page(rows.reset_index(drop=True), next_cursor, total, total_exact)
+
+
+def _estimate_total(conn, table, where, params):
+    # Count at most COUNT_CAP + 1 rows; past that the exact number hardly matters
+    query = f"SELECT COUNT(*) AS n FROM (SELECT 1 FROM {table}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += f" LIMIT {COUNT_CAP + 1})"
+    total = int(read_sql_cached(query, conn, (table,), params=params)["n"].iloc[0])
+    if total <= COUNT_CAP:
+        return total, True
+    if where:
+        return COUNT_CAP, False
+
+    # Unfiltered: both ends of the rowid b-tree, a couple of page reads at
+    # any size. Deleted rows leave gaps, so it can overcount slightly.
+    query = f"SELECT MAX(id) - MIN(id) + 1 AS n FROM {table}"
+    return int(read_sql_cached(query, conn, (table,))["n"].iloc[0]), False
@@ -0,0 +1,90 @@
+import pandas as pd
+from app.data.cache import bump, read_sql_cached
+from app.data.migrations import INCIDENT_ROLLUP_PERIODS, backfill_incident_rollups
+
+# Grains that are calendar periods, with the pandas frequency between them
+PERIOD_FREQUENCIES = {"day": "D", "week": "W-MON", "month": "MS"}
+PERIOD_FORMATS = {"day": "%Y-%m-%d", "week": "%Y-%m-%d", "month": "%Y-%m"}
+BREAKDOWNS = ("incident_type", "severity")
+
+
+def _check_grain(grain):
+    if grain not in INCIDENT_ROLLUP_PERIODS:
+        raise ValueError(f"Unknown rollup grain {grain!r}")
+
+
+def get_incident_trend(conn, grain="month", by="incident_type", periods=12):
+    """Incident counts for the last `periods` periods, one column per value of by.
+
+    Reads at most periods x values rows of incident_rollups, however many
+    incidents they cover. Periods with no incidents in between are filled
+    with zeros, so the index is continuous.
+    """
+    _check_grain(grain)
+    if by not in BREAKDOWNS:
+        raise ValueError(f"Cannot break incidents down by {by!r}")
+    query = f"""
+    SELECT period, {by}, SUM(count) AS count
+    FROM incident_rollups
+    WHERE grain = ? AND count > 0 AND period >= COALESCE((
+        SELECT period FROM (SELECT DISTINCT period FROM incident_rollups WHERE grain = ? AND count > 0)
+        ORDER BY period DESC LIMIT 1 OFFSET ?
+    ), '')
+    GROUP BY period, {by}
+    """
+    df = read_sql_cached(query, conn, ("cyber_incidents",), params=(grain, grain, periods - 1))
+    trend = df.pivot_table(index="period", columns=by, values="count", aggfunc="sum", fill_value=0)
+    # NULL type or severity is stored as ''
+    trend = trend.rename(columns={"": "Unknown"})
+    trend.columns.name = None
+    if grain in PERIOD_FREQUENCIES and len(trend):
+        fmt = PERIOD_FORMATS[grain]
+        dates = pd.to_datetime(trend.index, format=fmt)
+        full = pd.date_range(dates.min(), dates.max(), freq=PERIOD_FREQUENCIES[grain]).strftime(fmt)
+        trend = trend.reindex(full, fill_value=0).tail(periods)
+    return trend.rename_axis(grain).astype("int64")
+
+
+def get_period_deltas(conn, grain="month"):
+    """Counts for the latest period with incidents and the one before it.
+
+    Returns {"period", "previous_period", "current", "previous"}, where
+    current and previous are Series of count by severity, or None when
+    there are no incidents yet.
+    """
+    if grain not in PERIOD_FREQUENCIES:
+        raise ValueError(f"{grain!r} is not a calendar grain")
+    trend = get_incident_trend(conn, grain, by="severity", periods=2)
+    if trend.empty:
+        return None
+    fmt = PERIOD_FORMATS[grain]
+    period = trend.index[-1]
+    previous_period = (pd.to_datetime(period, format=fmt)
+                       - pd.tseries.frequencies.to_offset(PERIOD_FREQUENCIES[grain])).strftime(fmt)
+    previous = trend.loc[previous_period] if previous_period in trend.index else trend.iloc[-1] * 0
+    return {
+        "period": period,
+        "previous_period": previous_period,
+        "current": trend.iloc[-1],
+        "previous": previous,
+    }
+
+
+def get_hourly_counts(conn):
+    """Incidents by hour of day they were recorded, 00 to 23."""
+    query = """
+    SELECT period AS hour, SUM(count) AS count
+    FROM incident_rollups
+    WHERE grain = 'hour_of_day'
+    GROUP BY period
+    """
+    df = read_sql_cached(query, conn, ("cyber_incidents",))
+    hours = [f"{hour:02d}" for hour in range(24)]
+    return df.set_index("hour")["count"].reindex(hours, fill_value=0).astype("int64")
+
+
+def rebuild_incident_rollups(conn):
+    """Recount the rollups from scratch, e.g. after editing the table with triggers off."""
+    backfill_incident_rollups(conn)
+    conn.commit()
+    bump("cyber_incidents")
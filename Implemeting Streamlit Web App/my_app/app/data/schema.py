@@ -77,10 +77,9 @@ def create_it_tickets_table(conn):
     print("✔ it_tickets table created successfully.")
 
 def create_all_tables(conn):
-    create_users_table(conn)
-    create_cyber_incidents_table(conn)
-    create_datasets_metadata_table(conn)
-    create_it_tickets_table(conn)
+    # Tables and indexes are versioned now; only missing migrations are applied
+    from app.data.migrations import migrate
+    migrate(conn)
     print("✅ Users table created successfully!")
 
 
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+from app.data.cache import read_sql_cached
+
+# Days a ticket of each priority may take to resolve. Dates carry no time,
+# so a ticket resolved the day it was opened took 0 days.
+SLA_DAYS = {"Critical": 1, "High": 3, "Medium": 7, "Low": 14}
+RESOLVED_STATUSES = ("Resolved", "Closed")
+PERCENTILES = (0.5, 0.9, 0.95)
+# Age buckets for unresolved tickets, in days: [0, 1), [1, 7), ...
+AGE_BUCKETS = [0, 1, 7, 30, 90, np.inf]
+AGE_LABELS = ["<1d", "1-7d", "7-30d", "30-90d", "90d+"]
+
+
+def _resolution_histogram(conn):
+    # Resolved tickets counted per (priority, category, whole days taken).
+    # SQLite does the one pass over the rows, grouping on the raw dates in
+    # idx_tickets_sla order; the dates are then parsed once per group, not
+    # once per ticket. days is NaN where either date is missing or invalid.
+    statuses = ", ".join("?" for _ in RESOLVED_STATUSES)
+    query = f"""
+    SELECT priority, category, created_date, resolved_date, COUNT(*) AS count
+    FROM it_tickets
+    WHERE status IN ({statuses})
+    GROUP BY status, priority, category, created_date, resolved_date
+    """
+    df = read_sql_cached(query, conn, ("it_tickets",), params=RESOLVED_STATUSES)
+    df["days"] = (_to_dates(df.pop("resolved_date")) - _to_dates(df.pop("created_date"))).dt.days
+    return df.groupby(["priority", "category", "days"], dropna=False, as_index=False)["count"].sum()
+
+
+def _backlog_histogram(conn, today):
+    # Tickets not yet resolved, per (assigned_to, priority, age in days)
+    statuses = ", ".join("?" for _ in RESOLVED_STATUSES)
+    query = f"""
+    SELECT assigned_to, priority, created_date, COUNT(*) AS count
+    FROM it_tickets
+    WHERE status NOT IN ({statuses})
+    GROUP BY status, priority, category, created_date, resolved_date, assigned_to
+    """
+    df = read_sql_cached(query, conn, ("it_tickets",), params=RESOLVED_STATUSES)
+    df["age_days"] = (pd.Timestamp(today) - _to_dates(df.pop("created_date"))).dt.days
+    return df.groupby(["assigned_to", "priority", "age_days"], dropna=False, as_index=False)["count"].sum()
+
+
+def _to_dates(values):
+    # Dates are stored as text; anything that isn't ISO 8601 becomes NaT
+    return pd.to_datetime(values, format="ISO8601", errors="coerce").dt.normalize()
+
+
+def _percentiles(hist, by, value="days"):
+    # Weighted percentiles straight from the histogram: sort by value, then
+    # the first value whose running share of the group reaches q
+    hist = hist.sort_values(by + [value])
+    share = hist.groupby(by)["count"].cumsum() / hist.groupby(by)["count"].transform("sum")
+    return pd.DataFrame({
+        f"p{int(q * 100)}_days": hist[share >= q].groupby(by)[value].first()
+        for q in PERCENTILES
+    })
+
+
+def _resolution_summary(hist, by):
+    weighted = hist.assign(total_days=hist["days"] * hist["count"],
+                           breached_count=hist["count"] * hist["breached"])
+    grouped = weighted.groupby(by)
+    summary = pd.DataFrame({
+        "resolved": grouped["count"].sum(),
+        "mean_days": grouped["total_days"].sum() / grouped["count"].sum(),
+        "sla_breach_rate": grouped["breached_count"].sum() / grouped["count"].sum(),
+    })
+    return summary.join(_percentiles(hist, by))
+
+
+def get_ticket_sla_report(conn, today=None):
+    """Resolution times, SLA breaches and backlog ageing for it_tickets.
+
+    Returns a dict of DataFrames:
+        by_priority, by_category: resolved count, mean and p50/p90/p95
+            days to resolve, and the share resolved later than SLA_DAYS
+        distribution: resolved tickets per (days to resolve, priority)
+        backlog: unresolved tickets (any status but RESOLVED_STATUSES)
+            per assignee and age bucket, with the oldest age and how many
+            are already past their SLA
+    plus "overall" (headline numbers) and "unknown_dates", the resolved
+    tickets left out because a date is missing.
+
+    The rows are read by two GROUP BYs in SQLite over idx_tickets_sla; the
+    rest is vectorized pandas over their results.
+    """
+    today = (pd.Timestamp(today) if today is not None else pd.Timestamp.today()).normalize()
+    try:
+        resolved = _resolution_histogram(conn)
+        backlog = _backlog_histogram(conn, today)
+    except Exception as e:
+        print(f"Error computing ticket SLA report: {e}")
+        resolved = pd.DataFrame(columns=["priority", "category", "days", "count"])
+        backlog = pd.DataFrame(columns=["assigned_to", "priority", "age_days", "count"])
+
+    for frame, columns in ((resolved, ["priority", "category"]), (backlog, ["assigned_to", "priority"])):
+        frame[columns] = frame[columns].fillna("Unknown")
+    unknown = resolved["days"].isna()
+    unknown_dates = int(resolved.loc[unknown, "count"].sum())
+    resolved = resolved[~unknown].astype({"days": "int64", "count": "int64"})
+    sla = resolved["priority"].map(SLA_DAYS)
+    resolved["breached"] = (resolved["days"] > sla).astype("int64")
+
+    total_resolved = int(resolved["count"].sum())
+    overall = {
+        "resolved": total_resolved,
+        "open": int(backlog["count"].sum()),
+        "median_days": None,
+        "sla_breach_rate": None,
+    }
+    if total_resolved:
+        overall["median_days"] = int(_percentiles(resolved.assign(all="all"), ["all"])["p50_days"].iloc[0])
+        overall["sla_breach_rate"] = float((resolved["count"] * resolved["breached"]).sum() / total_resolved)
+
+    distribution = resolved.pivot_table(index="days", columns="priority", values="count",
+                                        aggfunc="sum", fill_value=0)
+    distribution.columns.name = None
+
+    backlog = backlog.dropna(subset=["age_days"]).astype({"age_days": "int64", "count": "int64"})
+    backlog["age"] = pd.cut(backlog["age_days"].clip(lower=0), AGE_BUCKETS, labels=AGE_LABELS, right=False)
+    backlog["past_sla"] = backlog["count"] * (backlog["age_days"] > backlog["priority"].map(SLA_DAYS))
+    ageing = backlog.pivot_table(index="assigned_to", columns="age", values="count",
+                                 aggfunc="sum", fill_value=0, observed=False)
+    ageing.columns = ageing.columns.astype(str)
+    grouped = backlog.groupby("assigned_to")
+    ageing = ageing.join(pd.DataFrame({
+        "open": grouped["count"].sum(),
+        "oldest_days": grouped["age_days"].max(),
+        "past_sla": grouped["past_sla"].sum(),
+    }))
+
+    return {
+        "overall": overall,
+        "unknown_dates": unknown_dates,
+        "by_priority": _resolution_summary(resolved, ["priority"]),
+        "by_category": _resolution_summary(resolved, ["category"]),
+        "distribution": distribution,
+        "backlog": ageing.sort_values("open", ascending=False),
+    }
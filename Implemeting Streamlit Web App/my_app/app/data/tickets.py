@@ -1,4 +1,7 @@
 import pandas as pd
+from app.data.cache import bump, read_sql_cached, read_table_cached
+from app.data.ingest import TABLES, frame_to_rows, insert_sql
+from app.data.pagination import Page, fetch_page
 
 def insert_ticket(conn, ticket_id, subject, priority, status, category=None,
                   description=None, created_date=None, assigned_to=None):
@@ -23,6 +26,7 @@ def insert_ticket(conn, ticket_id, subject, priority, status, category=None,
         ))
 
         conn.commit()
+        bump("it_tickets")
         return cursor.lastrowid
 
     except Exception as e:
@@ -32,12 +36,33 @@ def insert_ticket(conn, ticket_id, subject, priority, status, category=None,
 
 def get_all_tickets(conn):
     try:
-        return pd.read_sql_query("SELECT * FROM it_tickets", conn)
+        return read_table_cached(conn, "it_tickets").reset_index(drop=True)
     except Exception as e:
         print(f"Error fetching tickets: {e}")
         return pd.DataFrame()
 
 
+# Columns get_tickets_page() may sort and filter on
+TICKET_SORT_COLUMNS = ("id", "created_at")
+TICKET_FILTER_COLUMNS = ("priority", "status", "category", "assigned_to")
+
+
+def get_tickets_page(conn, after=None, limit=50, sort="id", descending=True,
+                      priority=None, status=None, category=None, assigned_to=None):
+    """One page of tickets, newest first by default.
+
+    Pass the returned page's next_cursor as `after` to get the next one.
+    Filters left as None are not applied.
+    """
+    try:
+        filters = {"priority": priority, "status": status, "category": category, "assigned_to": assigned_to}
+        return fetch_page(conn, "it_tickets", TICKET_SORT_COLUMNS, TICKET_FILTER_COLUMNS,
+                          sort, descending, filters, after, limit)
+    except Exception as e:
+        print(f"Error fetching tickets page: {e}")
+        return Page(pd.DataFrame(), None, 0, True)
+
+
 def update_ticket_status(conn, ticket_id, new_status):
     try:
         cursor = conn.cursor()
@@ -46,6 +71,7 @@ def update_ticket_status(conn, ticket_id, new_status):
             (new_status, ticket_id)
         )
         conn.commit()
+        bump("it_tickets")
         return cursor.rowcount
     except Exception as e:
         print(f"Error updating ticket: {e}")
@@ -60,6 +86,7 @@ def delete_ticket(conn, ticket_id):
             (ticket_id,)
         )
         conn.commit()
+        bump("it_tickets")
         return cursor.rowcount
     except Exception as e:
         print(f"Error deleting ticket: {e}")
@@ -73,7 +100,7 @@ def get_ticket_count_by_status(conn):
     GROUP BY status
     ORDER BY count DESC
     """
-    return pd.read_sql_query(query, conn)
+    return read_sql_cached(query, conn, ("it_tickets",))
 
 
 def get_high_priority_tickets(conn):
@@ -85,7 +112,7 @@ def get_high_priority_tickets(conn):
     WHERE priority = 'High'
     ORDER BY created_at DESC
     """
-    return pd.read_sql_query(query, conn)
+    return read_sql_cached(query, conn, ("it_tickets",))
 
 
 def get_assigned_ticket_counts(conn):
@@ -95,32 +122,14 @@ def get_assigned_ticket_counts(conn):
     GROUP BY assigned_to
     ORDER BY count DESC
     """
-    return pd.read_sql_query(query, conn)
+    return read_sql_cached(query, conn, ("it_tickets",))
 
 
 def insert_ticket_from_df(conn, df):
+    # Column-wise tuples and one executemany instead of an execute per iterrows() row
+    columns = list(TABLES["it_tickets"]["columns"])
     cursor = conn.cursor()
-    count = 0
-
-    for _, row in df.iterrows():
-        cursor.execute(
-            """
-            INSERT OR IGNORE INTO it_tickets
-            (ticket_id, subject, priority, status, category, description, created_date, assigned_to)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                row["ticket_id"],
-                row["subject"],
-                row["priority"],
-                row["status"],
-                row.get("category", None),
-                row.get("description", None),
-                row.get("created_date", None),
-                row.get("assigned_to", None)
-            )
-        )
-        count += 1
-
+    cursor.executemany(insert_sql("it_tickets", columns), frame_to_rows(df, columns))
     conn.commit()
-    return count
\ No newline at end of file
+    bump("it_tickets")
+    return len(df)
@@ -1,57 +1,76 @@
-from app.data.db import connect_database
+import os
+from app.data.db import get_reader, get_writer
+from app.services.credential_cache import CredentialCache
 import bcrypt
 
+# Off unless CREDENTIAL_CACHE_TTL (seconds) is set or enable_credential_cache() is called
+credential_cache = None
+
+def enable_credential_cache(ttl=60, max_entries=10000):
+    """Let repeat logins with unchanged credentials skip bcrypt for ttl seconds."""
+    global credential_cache
+    credential_cache = CredentialCache(ttl, max_entries)
+    return credential_cache
+
+if os.environ.get("CREDENTIAL_CACHE_TTL"):
+    enable_credential_cache(int(os.environ["CREDENTIAL_CACHE_TTL"]))
+
 def get_user_by_username(username):
     """Retrieve user by username."""
-    conn = connect_database()
+    conn = get_reader()
     cursor = conn.cursor()
     cursor.execute(
         "SELECT * FROM users WHERE username = ?",
         (username,)
     )
     user = cursor.fetchone()
-    conn.close()
     return user
 
 def insert_user(username, password_hash, role='user'):
     """Insert new user. Expects password_hash (already bcrypt hashed)."""
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-        (username, password_hash, role)
-    )
-    conn.commit()
-    conn.close()
+    with get_writer() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+            (username, password_hash, role)
+        )
+        conn.commit()
+
+def check_password(username, plain_password, stored_hash):
+    """Check plain_password against the user's stored bcrypt hash, through the credential cache."""
+    # Ensure stored_hash is str for the cache key and bytes for bcrypt
+    if isinstance(stored_hash, bytes):
+        stored_hash = stored_hash.decode()
+
+    if credential_cache is not None and credential_cache.check(username, plain_password, stored_hash):
+        return True
+
+    verified = bcrypt.checkpw(plain_password.encode(), stored_hash.encode())
+    if verified and credential_cache is not None:
+        credential_cache.add(username, plain_password, stored_hash)
+    return verified
 
 def verify_user(username, plain_password):
     """Verify username + bcrypt hashed password."""
-    conn = connect_database()
+    conn = get_reader()
     cursor = conn.cursor()
 
     cursor.execute("SELECT password_hash FROM users WHERE username = ?", (username,))
     result = cursor.fetchone()
-    conn.close()
 
     if not result:
         return False
 
     stored_hash = result["password_hash"] if isinstance(result, dict) else result[0]
-
-    # Ensure stored_hash is bytes
-    if isinstance(stored_hash, str):
-        stored_hash = stored_hash.encode()
-
-    return bcrypt.checkpw(plain_password.encode(), stored_hash)
+    return check_password(username, plain_password, stored_hash)
 
 def get_user_role(username):
     """Retrieve the role of a user."""
-    conn = connect_database()
+    conn = get_reader()
     cursor = conn.cursor()
     cursor.execute(
         "SELECT role FROM users WHERE username = ?",
         (username,)
     )
     result = cursor.fetchone()
-    conn.close()
     return result[0] if result else None
@@ -0,0 +1,95 @@
+# Source of truth for CredentialCache. "Secure Authentication System/
+# credential_cache.py" is a verbatim copy, since the two projects don't share
+# a package; change this file and copy it over, never the other way round.
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CredentialCache:
+    """Short-lived memory of logins that recently passed a full hash check.
+
+    An entry's key is an HMAC, under a random per-process secret, of the
+    username, the submitted password and the stored hash. The plain password
+    is never kept, and the keys are useless outside this process. Because the
+    stored hash is part of the key, a password change or rehash can never
+    produce a hit for the old credentials. invalidate() also frees the stale
+    entries right away.
+
+    Only successful verifications are cached. A wrong password always pays
+    the full hash cost.
+    """
+
+    def __init__(self, ttl=60, max_entries=10000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._secret = os.urandom(32)
+        # key -> (expires, username), oldest first
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def _key(self, username, password, stored_hash):
+        message = "\0".join((username, password, stored_hash)).encode("utf-8")
+        return hmac.digest(self._secret, message, hashlib.sha256)
+
+    def check(self, username, password, stored_hash):
+        """True if these exact credentials were verified within the TTL."""
+        key = self._key(username, password, stored_hash)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.hits += 1
+                return True
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return False
+
+    def add(self, username, password, stored_hash):
+        key = self._key(username, password, stored_hash)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (self.clock() + self.ttl, username)
+            self._by_user.setdefault(username, set()).add(key)
+            # Every entry has the same TTL, so the oldest is also the next to expire
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, username):
+        """Forget every cached login of username, e.g. after a password change."""
+        with self._lock:
+            for key in list(self._by_user.get(username, ())):
+                self._drop(key)
+
+    def _drop(self, key):
+        _, username = self._entries.pop(key)
+        keys = self._by_user[username]
+        keys.discard(key)
+        if not keys:
+            del self._by_user[username]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.data import host_metrics
+from app.data.db import DB_PATH, get_writer
+
+# Seconds between samples, and how many raw samples the ring buffer holds
+SAMPLE_SECONDS = 5
+RING_SIZE = 720  # one hour at 5 s
+# Seconds between flushes of completed minutes to host_metrics
+FLUSH_SECONDS = 60
+
+# Ring buffer columns: sample time, then host_metrics.COLUMNS, then uptime
+FIELDS = ["ts"] + host_metrics.COLUMNS + ["uptime_s"]
+
+
+def proc_available():
+    return os.path.exists("/proc/stat")
+
+
+def _read_cpu():
+    # First line of /proc/stat: cumulative jiffies per CPU state
+    with open("/proc/stat") as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+    return sum(values), idle
+
+
+def _read_memory():
+    fields = {}
+    with open("/proc/meminfo") as f:
+        for line in f:
+            name, value = line.split(":", 1)
+            if name in ("MemTotal", "MemAvailable"):
+                fields[name] = int(value.split()[0]) / 1024  # kB -> MB
+    return fields["MemTotal"] - fields["MemAvailable"], fields["MemTotal"]
+
+
+def _read_network():
+    # Bytes received and sent over every interface but loopback
+    rx = tx = 0
+    with open("/proc/net/dev") as f:
+        for line in f.readlines()[2:]:
+            name, data = line.split(":", 1)
+            if name.strip() == "lo":
+                continue
+            values = data.split()
+            rx += int(values[0])
+            tx += int(values[8])
+    return rx, tx
+
+
+def _read_uptime():
+    with open("/proc/uptime") as f:
+        return float(f.read().split()[0])
+
+
+def _read_disk(path):
+    stats = os.statvfs(path)
+    total = stats.f_blocks * stats.f_frsize / 1024 ** 3
+    free = stats.f_bavail * stats.f_frsize / 1024 ** 3
+    return total - free, total
+
+
+class HostCollector:
+    """Samples the host into a fixed-size ring buffer on a background thread.
+
+    Every SAMPLE_SECONDS one row of FIELDS is written over the oldest row
+    of a preallocated NumPy array, so memory stays the same however long
+    the app runs. Every FLUSH_SECONDS the completed minutes are averaged
+    into host_metrics, and each completed hour of minutes is averaged
+    again into an hourly point.
+    """
+
+    def __init__(self, disk_path=None, sample_seconds=SAMPLE_SECONDS, ring_size=RING_SIZE):
+        self.disk_path = str(disk_path or DB_PATH.resolve().parent)
+        self.sample_seconds = sample_seconds
+        self._ring = np.full((ring_size, len(FIELDS)), np.nan)
+        self._next = 0  # row the next sample goes into
+        self._count = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._previous = None  # (cpu total, cpu idle, rx, tx, time) of the last sample
+        self._flushed_until = None  # minutes before this are in host_metrics
+        self._rolled_until = None  # hours before this are in host_metrics
+        self.cpu_seconds = 0.0  # thread CPU time spent sampling and flushing
+
+    def sample(self, now=None):
+        """Take one sample; CPU and network rates need the previous one."""
+        now = time.time() if now is None else now
+        cpu_total, cpu_idle = _read_cpu()
+        rx, tx = _read_network()
+        mem_used, mem_total = _read_memory()
+        disk_used, disk_total = _read_disk(self.disk_path)
+
+        cpu_pct = rx_bps = tx_bps = np.nan
+        if self._previous is not None:
+            last_total, last_idle, last_rx, last_tx, last_time = self._previous
+            if cpu_total > last_total:
+                cpu_pct = 100.0 * (1 - (cpu_idle - last_idle) / (cpu_total - last_total))
+            elapsed = now - last_time
+            if elapsed > 0:
+                rx_bps = (rx - last_rx) / elapsed
+                tx_bps = (tx - last_tx) / elapsed
+        self._previous = (cpu_total, cpu_idle, rx, tx, now)
+
+        row = [now, cpu_pct, mem_used, mem_total, rx_bps, tx_bps, disk_used, disk_total, _read_uptime()]
+        with self._lock:
+            self._ring[self._next] = row
+            self._next = (self._next + 1) % len(self._ring)
+            self._count = min(self._count + 1, len(self._ring))
+
+    def samples(self):
+        """Copy of the buffered samples, oldest first, as a 2-D array of FIELDS."""
+        with self._lock:
+            if self._count < len(self._ring):
+                return self._ring[:self._count].copy()
+            return np.roll(self._ring, -self._next, axis=0)
+
+    def latest(self):
+        """The newest sample as a dict of FIELDS, or None before the first."""
+        with self._lock:
+            if not self._count:
+                return None
+            return dict(zip(FIELDS, self._ring[self._next - 1].tolist()))
+
+    def flush(self, conn, now=None):
+        """Write completed minutes since the last flush, then completed hours."""
+        now = time.time() if now is None else now
+        minute_end = int(now) // host_metrics.MINUTE * host_metrics.MINUTE
+        if self._flushed_until is None:
+            self._flushed_until = (host_metrics.latest_ts(conn, host_metrics.MINUTE) or 0) + host_metrics.MINUTE
+
+        samples = self.samples()
+        times = samples[:, 0]
+        samples = samples[(times >= self._flushed_until) & (times < minute_end)]
+        if len(samples):
+            # Mean of each column per minute, leaving out NaNs (the first
+            # sample has no CPU or network rate)
+            buckets = (samples[:, 0] // host_metrics.MINUTE * host_metrics.MINUTE).astype(np.int64)
+            starts, index = np.unique(buckets, return_inverse=True)
+            values = samples[:, 1:1 + len(host_metrics.COLUMNS)]
+            present = ~np.isnan(values)
+            sums = np.zeros((len(starts), values.shape[1]))
+            counts = np.zeros((len(starts), values.shape[1]))
+            np.add.at(sums, index, np.where(present, values, 0.0))
+            np.add.at(counts, index, present)
+            with np.errstate(invalid="ignore"):
+                means = sums / counts
+            rows = [(int(start), *[None if np.isnan(v) else float(v) for v in row])
+                    for start, row in zip(starts, means)]
+            host_metrics.insert_points(conn, host_metrics.MINUTE, rows)
+        self._flushed_until = minute_end
+
+        hour_end = minute_end // host_metrics.HOUR * host_metrics.HOUR
+        if self._rolled_until is None:
+            last_hour = host_metrics.latest_ts(conn, host_metrics.HOUR)
+            self._rolled_until = 0 if last_hour is None else last_hour + host_metrics.HOUR
+        if hour_end > self._rolled_until:
+            host_metrics.roll_up(conn, self._rolled_until, hour_end)
+            host_metrics.prune(conn, now)
+            self._rolled_until = hour_end
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while not self._stop.wait(self.sample_seconds):
+            started = time.thread_time()
+            try:
+                self.sample()
+                if time.monotonic() - last_flush >= FLUSH_SECONDS:
+                    with get_writer() as conn:
+                        self.flush(conn)
+                    last_flush = time.monotonic()
+            except Exception as e:
+                print(f"Error collecting host metrics: {e}")
+            self.cpu_seconds += time.thread_time() - started
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="host-collector", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        # Samples of the minute in progress are not flushed
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_collector = None
+_collector_lock = threading.Lock()
+
+
+def start_collector():
+    """The process-wide collector, started on first use; None without /proc."""
+    global _collector
+    if not proc_available():
+        return None
+    with _collector_lock:
+        if _collector is None:
+            _collector = HostCollector()
+            # A first sample right away, so the page has memory and disk
+            # figures before the thread's first interval has passed
+            _collector.sample()
+            _collector.start()
+        return _collector
@@ -1,37 +1,72 @@
+import re
 import sqlite3
+import sys
+import time
+import zlib
 import bcrypt
+from collections import namedtuple
 from pathlib import Path
-from app.data.db import connect_database
+from app.data import users
+from app.data.db import get_reader, get_writer, pool
+
+# Who is logged in; Home.py keeps it in st.session_state.principal
+Principal = namedtuple("Principal", ["id", "username", "role"])
+
+
+def authenticate(username, password):
+    """Return the Principal for username if password matches, else None.
+
+    Hash, role and id come back from one lookup on the username's unique
+    index. sqlite3 keeps the prepared statement on the connection, so
+    later logins on the same pooled reader skip parsing it again. The
+    reader is checked out from the pool directly, since get_reader() also
+    syncs the query cache, which logins don't use.
+    """
+    with pool.reading() as conn:
+        row = conn.execute(
+            "SELECT id, password_hash, role FROM users WHERE username = ?", (username,)
+        ).fetchone()
+    if not row:
+        return None
+
+    user_id, stored_hash, role = row
+    # Same check as users.verify_user, credential cache included
+    if not users.check_password(username, password, stored_hash):
+        return None
+    return Principal(user_id, username, role)
 
-def register_user(username, password, role="user"):
-    conn = connect_database()
-    cursor = conn.cursor()
 
-    cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-    existing = cursor.fetchone()
+def register_user(username, password, role="user"):
+    # Covered by the unique index on username; saves hashing for a taken name
+    with pool.reading() as conn:
+        existing = conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone()
     if existing:
-        conn.close()
         return False, f"Username '{username}' already exists."
 
+    # Hashed before taking the writer, so other sessions' writes don't wait on bcrypt
     password_bytes = password.encode("utf-8")
     hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
     password_hash = hashed.decode("utf-8")
 
-    cursor.execute(
-        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-        (username, password_hash, role)
-    )
-    conn.commit()
-    conn.close()
+    with get_writer() as conn:
+        try:
+            conn.execute(
+                "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                (username, password_hash, role)
+            )
+        except sqlite3.IntegrityError:
+            # Registered by another session while we were hashing
+            conn.rollback()
+            return False, f"Username '{username}' already exists."
+        conn.commit()
     return True, f"User '{username}' registered successfully!"
 
 
 def login_user(username, password):
-    conn = connect_database()
+    conn = get_reader()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
     user = cursor.fetchone()
-    conn.close()
 
     if not user:
         return False, "Username not found."
@@ -44,44 +79,178 @@ def login_user(username, password):
     return False, "Incorrect password."
 
 
-def migrate_users_from_file(conn, filepath="DATA/users.txt"):
+# Lines of a users.txt export inserted (and checkpointed) per transaction
+MIGRATE_BATCH_ROWS = 10000
+# How often progress is printed during a migration
+PROGRESS_SECONDS = 5
+# Invalid lines printed in the summary; the rest are only counted
+MAX_REPORTED_INVALID = 5
+
+# First line of files written by the Secure Authentication System's
+# user_file.py; their records carry a crc32 of "username,hash,role"
+USERS_FILE_HEADER = "#users-v2"
+BCRYPT_HASH = re.compile(r"\$2[abxy]?\$\d\d\$[./A-Za-z0-9]{53}")
+
+
+def parse_user_line(line, checksummed=False):
+    """Return (username, password_hash, role), or the reason line is invalid."""
+    parts = [part.strip() for part in line.split(",")]
+    if checksummed:
+        if len(parts) != 4:
+            return "wrong number of fields"
+        body = ",".join(parts[:3])
+        if format(zlib.crc32(body.encode("utf-8")), "08x") != parts[3].lower():
+            return "checksum mismatch"
+    elif len(parts) < 3:
+        return "wrong number of fields"
+    username, password_hash, role = parts[:3]
+    if not username or not role:
+        return "empty username or role"
+    if not BCRYPT_HASH.fullmatch(password_hash):
+        return "not a bcrypt hash"
+    return username, password_hash, role
+
+
+def _load_checkpoint(conn, source, size):
+    row = conn.execute(
+        "SELECT byte_offset, lines, inserted, existing, invalid FROM import_checkpoints WHERE source = ?",
+        (source,)
+    ).fetchone()
+    # A file smaller than the saved offset was replaced; start it over
+    if row is None or row[0] > size:
+        return {"byte_offset": 0, "lines": 0, "inserted": 0, "existing": 0, "invalid": 0}
+    return dict(zip(["byte_offset", "lines", "inserted", "existing", "invalid"], row))
+
+
+def _save_checkpoint(conn, source, progress):
+    conn.execute("""
+        INSERT INTO import_checkpoints (source, byte_offset, lines, inserted, existing, invalid, updated_at)
+        VALUES (:source, :byte_offset, :lines, :inserted, :existing, :invalid, CURRENT_TIMESTAMP)
+        ON CONFLICT (source) DO UPDATE SET
+            byte_offset = excluded.byte_offset, lines = excluded.lines, inserted = excluded.inserted,
+            existing = excluded.existing, invalid = excluded.invalid, updated_at = excluded.updated_at
+    """, dict(progress, source=source))
+
+
+def migrate_users_from_file(conn, filepath="DATA/users.txt", batch_rows=MIGRATE_BATCH_ROWS, restart=False):
     """
     Migrate users from users.txt to the database.
 
+    The file is streamed in batches of batch_rows lines. Each batch is
+    inserted with executemany and committed together with the byte offset
+    reached, so an interrupted run picks up after the last committed batch.
+    Lines with a malformed record or a hash that isn't bcrypt are counted
+    and skipped. Users already in the database are left as they are.
+
     Args:
-        conn: Database connection
+        conn: Writable database connection
         filepath: Path to users.txt file (can be string or Path object)
+        batch_rows: Lines per transaction
+        restart: Ignore any saved checkpoint and read the file from the top
 
     Returns:
-        int: Number of users successfully migrated
+        int: Number of users inserted, over all runs of this file
     """
     filepath = Path(filepath)  # Convert string to Path object
     if not filepath.exists():
         print(f"⚠️  File not found: {filepath}")
         print("   No users to migrate.")
         return 0
-    cursor = conn.cursor()
-    migrated_count = 0
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            parts = line.split(',')
-            if len(parts) >= 3:
-                username = parts[0].strip()
-                password_hash = parts[1].strip()
-                role = parts[2].strip()
-                try:
-                    cursor.execute(
-                        "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                        (username, password_hash, role)
-                    )
-                    if cursor.rowcount > 0:
-                        migrated_count += 1
-                except sqlite3.Error as e:
-                    print(f"  ❌ Error migrating user {username}: {e}")
-
-    conn.commit()
-    print(f"✅ Migrated {migrated_count} users from {filepath.name}")
-    return migrated_count
\ No newline at end of file
+
+    source = str(filepath.resolve())
+    size = filepath.stat().st_size
+    progress = _load_checkpoint(conn, source, -1 if restart else size)
+    users_before = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    resumed_at = progress["byte_offset"]
+    if resumed_at:
+        print(f"Resuming {filepath.name} at byte {resumed_at:,} (line {progress['lines'] + 1:,})")
+
+    insert = "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)"
+    invalid_examples = []
+    start = last_report = time.perf_counter()
+    lines_this_run = 0
+    inserted_this_run = 0
+    # Binary mode, so the offset saved is an exact byte position to seek to
+    with open(filepath, "rb") as f:
+        checksummed = f.readline().decode("utf-8", "replace").strip() == USERS_FILE_HEADER
+        f.seek(progress["byte_offset"])
+        offset = progress["byte_offset"]
+        while True:
+            batch = []
+            read = 0
+            for raw in f:
+                offset += len(raw)
+                read += 1
+                line = raw.decode("utf-8", "replace").strip()
+                if not line or line.startswith("#"):
+                    if read >= batch_rows:
+                        break
+                    continue
+                record = parse_user_line(line, checksummed)
+                if isinstance(record, str):
+                    progress["invalid"] += 1
+                    if len(invalid_examples) < MAX_REPORTED_INVALID:
+                        invalid_examples.append((progress["lines"] + read, record))
+                else:
+                    batch.append(record)
+                if read >= batch_rows:
+                    break
+            if not read:
+                break
+
+            try:
+                cursor = conn.cursor()
+                cursor.executemany(insert, batch)
+                inserted = max(cursor.rowcount, 0)
+                progress["inserted"] += inserted
+                inserted_this_run += inserted
+                progress["existing"] += len(batch) - inserted
+                progress["lines"] += read
+                progress["byte_offset"] = offset
+                _save_checkpoint(conn, source, progress)
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                print(f"  ❌ Error migrating users at line {progress['lines'] + 1:,}: {e}")
+                print(f"   Run again to resume from byte {progress['byte_offset']:,}.")
+                return progress["inserted"]
+            lines_this_run += read
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_SECONDS:
+                last_report = now
+                print(f"  {progress['lines']:,} lines ({offset / size:.0%}), "
+                      f"{lines_this_run / (now - start):,.0f} rows/s")
+
+    elapsed = time.perf_counter() - start
+    users_after = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    valid = progress["inserted"] + progress["existing"]
+
+    print(f"✅ Migrated {filepath.name}: {lines_this_run:,} lines in {elapsed:.1f}s "
+          f"({lines_this_run / elapsed if elapsed else 0:,.0f} rows/s)")
+    # Totals cover every run over this file, resumed ones included
+    print(f"   Lines read:        {progress['lines']:,}")
+    print(f"   Blank or comment:  {progress['lines'] - valid - progress['invalid']:,}")
+    print(f"   Invalid, skipped:  {progress['invalid']:,}")
+    for line_number, reason in invalid_examples:
+        print(f"     line {line_number:,}: {reason}")
+    print(f"   Valid records:     {valid:,}")
+    print(f"   Inserted:          {progress['inserted']:,}")
+    print(f"   Already present:   {progress['existing']:,}")
+    print(f"   Users table:       {users_before:,} -> {users_after:,}")
+    if users_after - users_before != inserted_this_run:
+        # Another session registered or removed users during the run
+        print(f"   ⚠️  Table grew by {users_after - users_before:,}, "
+              f"but this run inserted {inserted_this_run:,}")
+    return progress["inserted"]
+
+
+def main():
+    filepath = sys.argv[1] if len(sys.argv) > 1 else "DATA/users.txt"
+    restart = "--restart" in sys.argv[2:]
+    with get_writer() as conn:
+        migrate_users_from_file(conn, filepath, restart=restart)
+
+
+if __name__ == "__main__":
+    main()
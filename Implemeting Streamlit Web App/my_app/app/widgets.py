@@ -0,0 +1,41 @@
+import streamlit as st
+
+from app.data.pagination import COUNT_CAP
+
+
+def paged_dataframe(key, fetch, page_size=50):
+    """Show one page from fetch(after=..., limit=...) with Previous/Next buttons.
+
+    The cursors of the pages visited so far are kept in st.session_state
+    under key, so going back costs the same as going forward. Give the key
+    any filter values too, so changing a filter starts again at page 1.
+    Returns the Page shown.
+    """
+    state_key = f"{key}_cursors"
+    cursors = st.session_state.setdefault(state_key, [None])
+    page = fetch(after=cursors[-1], limit=page_size)
+    if page.rows.empty and len(cursors) > 1:
+        # The rows of this page were deleted; fall back to the first page
+        cursors[:] = [None]
+        page = fetch(after=None, limit=page_size)
+
+    st.dataframe(page.rows, use_container_width=True, hide_index=True)
+
+    if page.total_exact:
+        total = f"{page.total:,}"
+    elif page.total == COUNT_CAP:
+        total = f"over {COUNT_CAP:,}"
+    else:
+        total = f"about {page.total:,}"
+    col1, col2, col3 = st.columns([1, 1, 6])
+    previous_clicked = col1.button("Previous", key=f"{key}_previous", disabled=len(cursors) == 1)
+    next_clicked = col2.button("Next", key=f"{key}_next", disabled=page.next_cursor is None)
+    col3.caption(f"Page {len(cursors)} of {total} rows")
+
+    if previous_clicked:
+        cursors.pop()
+        st.rerun()
+    if next_clicked:
+        cursors.append(page.next_cursor)
+        st.rerun()
+    return page
@@ -1,13 +1,14 @@
 import streamlit as st
-import pandas as pd
-from app.data.db import connect_database
-from app.data.incidents import get_all_incidents
-from app.data.datasets import get_all_datasets
-from app.data.tickets import get_all_tickets
+from app.data.db import get_reader
+from app.data.incidents import get_incidents_page
+from app.data.datasets import get_datasets_page
+from app.data.tickets import get_tickets_page
+from app.data.metrics import get_dataset_metrics, get_incident_metrics, get_ticket_metrics
+from app.widgets import paged_dataframe
 
 st.set_page_config(page_title="Dashboard", layout="wide")
 def get_conn():
-    return connect_database()
+    return get_reader()
 
 conn = get_conn()
 
@@ -21,27 +22,25 @@ if st.sidebar.button("Logout"):
     st.session_state.logged_in = False
     st.session_state.username = ""
     st.session_state.role = ""
+    st.session_state.principal = None
     st.switch_page("Home.py")
 
 st.title("Main Dashboard")
 
-incidents = get_all_incidents(conn)
-datasets = get_all_datasets(conn)
-tickets = get_all_tickets(conn)
-
 col1, col2, col3 = st.columns(3)
+col1.metric("Total Incidents", get_incident_metrics(conn)["total"])
+col2.metric("Datasets Available", get_dataset_metrics(conn)["total"])
+col3.metric("Open Tickets", get_ticket_metrics(conn)["open"])
+st.divider()
 
-col1.metric("Total Incidents", len(incidents))
-col2.metric("Datasets Available", len(datasets))
-col3.metric("Open Tickets", len(tickets[tickets["status"] == "Open"]))
+PAGE_SIZE = 25
 
-st.divider()
 st.subheader("Quick View")
 st.write("### Cyber Incidents")
-st.dataframe(pd.DataFrame(incidents), use_container_width=True)
+paged_dataframe("dash_incidents", lambda **kw: get_incidents_page(conn, **kw), PAGE_SIZE)
 
 st.write("### Datasets Metadata")
-st.dataframe(pd.DataFrame(datasets), use_container_width=True)
+paged_dataframe("dash_datasets", lambda **kw: get_datasets_page(conn, **kw), PAGE_SIZE)
 
 st.write("### Tickets")
-st.dataframe(pd.DataFrame(tickets), use_container_width=True)
\ No newline at end of file
+paged_dataframe("dash_tickets", lambda **kw: get_tickets_page(conn, **kw), PAGE_SIZE)
@@ -1,13 +1,15 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-from app.data.db import connect_database
-from app.data.incidents import get_all_incidents, insert_incident, update_incident_status, delete_incident
+from app.data.db import get_reader, get_writer
+from app.data.incidents import (get_incidents_page, get_incident, get_incident_statuses, insert_incident,
+                                update_incident_status, delete_incident)
+from app.data.metrics import get_incident_metrics
+from app.widgets import paged_dataframe
 
 st.set_page_config(page_title="Cyber Incidents", layout="wide")
 
 def get_conn():
-    return connect_database()
+    return get_reader()
 
 conn = get_conn()
 
@@ -21,40 +23,50 @@ if st.sidebar.button("Logout"):
     st.session_state.logged_in = False
     st.session_state.username = ""
     st.session_state.role = ""
+    st.session_state.principal = None
     st.switch_page("Home.py")
 
 st.title("Incident Management")
 
 tab1, tab2, tab3, tab4 = st.tabs(["View Data", "Add Incident", "Update Status", "Delete"])
 
-incidents = get_all_incidents(conn)
-df = pd.DataFrame(incidents)
+PAGE_SIZE = 50
+STATUSES = ["Open", "Investigating", "Resolved", "Closed"]
+# Statuses already in the table (imported data may use others) come after the usual ones
+all_statuses = STATUSES + [s for s in get_incident_statuses(conn) if s not in STATUSES]
 
 with tab1:
     st.subheader("All Incidents")
 
-    if len(df) > 0:
-        st.dataframe(df, use_container_width=True)
-        st.divider()
-        st.subheader("Security Metrics")
-        col1, col2, col3 = st.columns(3)
+    col1, col2 = st.columns(2)
+    severity_filter = col1.selectbox("Severity", ["All", "Low", "Medium", "High", "Critical"])
+    status_filter = col2.selectbox("Status", ["All"] + all_statuses)
+    filters = {
+        "severity": None if severity_filter == "All" else severity_filter,
+        "status": None if status_filter == "All" else status_filter,
+    }
 
-        threats_detected = len(df[df['status'] == 'Open'])
-        col1.metric("Threats Detected", threats_detected)
+    # Only the visible page is read
+    page = paged_dataframe(f"incidents_{severity_filter}_{status_filter}",
+                           lambda **kw: get_incidents_page(conn, **kw, **filters), PAGE_SIZE)
+    df = page.rows
 
-        vulnerabilities = len(df[df['severity'] == 'High']) + len(df[df['severity'] == 'Critical'])
-        col2.metric("Vulnerabilities", vulnerabilities)
+    if page.total == 0:
+        st.info("No incidents found.")
 
-        incidents_count = len(df)
-        col3.metric("Incidents", incidents_count)
+    # The metrics cover the whole table, not just what the filters above matched
+    st.divider()
+    st.subheader("Security Metrics")
+    col1, col2, col3 = st.columns(3)
 
-        st.divider()
-        st.subheader("Threat Distribution")
-        threat_data = df['incident_type'].value_counts()
-        st.bar_chart(threat_data)
+    metrics = get_incident_metrics(conn)
+    col1.metric("Threats Detected", metrics["threats_detected"])
+    col2.metric("Vulnerabilities", metrics["vulnerabilities"])
+    col3.metric("Incidents", metrics["total"])
 
-    else:
-        st.info("No incidents found.")
+    st.divider()
+    st.subheader("Threat Distribution")
+    st.bar_chart(metrics["by_type"])
 
 with tab2:
     st.subheader("Add New Incident")
@@ -62,7 +74,7 @@ with tab2:
         incident_date = st.date_input("Date", value=datetime.now())
         incident_type = st.selectbox("Incident Type", ["Malware", "DDoS", "SQL Injection", "Phishing", "Ransomware"])
         severity = st.selectbox("Severity", ["Low", "Medium", "High", "Critical"])
-        status = st.selectbox("Status", ["Open", "Investigating", "Closed"])
+        status = st.selectbox("Status", STATUSES)
         description = st.text_area("Description", placeholder="Enter incident description...")
 
         submit = st.form_submit_button("Add Incident", type="primary")
@@ -70,39 +82,45 @@ with tab2:
             if description == "":
                 st.error("Please enter a description.")
             else:
-                insert_incident(conn, str(incident_date), incident_type, severity, status, description)
+                with get_writer() as writer:
+                    insert_incident(writer, str(incident_date), incident_type, severity, status, description)
                 st.success("Incident added successfully!")
                 st.rerun()
 
 with tab3:
     st.subheader("Update Incident Status")
-    if len(df) > 0:
-        incident_ids = df['id'].tolist()
-        selected_id = st.selectbox("Select Incident ID", incident_ids)
-        current = df[df['id'] == selected_id].iloc[0]
+    # Any id can be looked up, not only the ones on the page shown in View Data
+    first_id = int(df['id'].iloc[0]) if len(df) > 0 else 1
+    selected_id = int(st.number_input("Incident ID", min_value=1, value=first_id, step=1))
+    found = get_incident(conn, selected_id)
+    if len(found) > 0:
+        current = found.iloc[0]
         st.write(f"**Current Status:** {current['status']}")
         st.write(f"**Type:** {current['incident_type']}")
         st.write(f"**Severity:** {current['severity']}")
         st.divider()
 
         with st.form("update_form"):
-            new_status = st.selectbox("New Status", ["Open", "Investigating", "Closed"])
+            new_status = st.selectbox("New Status", all_statuses)
             new_severity = st.selectbox("New Severity", ["Low", "Medium", "High", "Critical"])
             update_btn = st.form_submit_button("Update Incident", type="primary")
 
             if update_btn:
-                update_incident_status(conn, selected_id, new_status)
+                with get_writer() as writer:
+                    update_incident_status(writer, selected_id, new_status)
                 st.success(f"Incident {selected_id} updated successfully!")
                 st.rerun()
     else:
-        st.info("No incidents to update.")
+        st.info(f"No incident with id {selected_id}.")
 
 with tab4:
     st.subheader("Delete Incident")
-    if len(df) > 0:
-        incident_ids = df['id'].tolist()
-        selected_id = st.selectbox("Select Incident ID to Delete", incident_ids, key="delete_select")
-        current = df[df['id'] == selected_id].iloc[0]
+    first_id = int(df['id'].iloc[0]) if len(df) > 0 else 1
+    selected_id = int(st.number_input("Incident ID to Delete", min_value=1, value=first_id, step=1,
+                                      key="delete_select"))
+    found = get_incident(conn, selected_id)
+    if len(found) > 0:
+        current = found.iloc[0]
         st.write(f"**Date:** {current['date']}")
         st.write(f"**Type:** {current['incident_type']}")
         st.write(f"**Status:** {current['status']}")
@@ -112,8 +130,9 @@ with tab4:
         col1, col2 = st.columns([1, 3])
         with col1:
             if st.button("Delete", type="primary"):
-                delete_incident(conn, selected_id)
+                with get_writer() as writer:
+                    delete_incident(writer, selected_id)
                 st.success(f"Incident {selected_id} deleted!")
                 st.rerun()
     else:
-        st.info("No incidents to delete.")
\ No newline at end of file
+        st.info(f"No incident with id {selected_id}.")
\ No newline at end of file
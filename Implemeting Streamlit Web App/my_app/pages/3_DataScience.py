@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
-from app.data.db import connect_database
+from app.data.db import get_reader
 
 st.set_page_config(page_title="Data Science", layout="wide")
 
 def get_conn():
-    return connect_database()
+    return get_reader()
 conn = get_conn()
 
 if not st.session_state.get("logged_in", False):
@@ -19,6 +19,7 @@ if st.sidebar.button("Logout"):
     st.session_state.logged_in = False
     st.session_state.username = ""
     st.session_state.role = ""
+    st.session_state.principal = None
     st.switch_page("Home.py")
 
 st.title("Data Science")
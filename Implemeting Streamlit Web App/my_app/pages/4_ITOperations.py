@@ -1,11 +1,15 @@
+import time
 import streamlit as st
 import pandas as pd
-from app.data.db import connect_database
+from app.data.db import get_reader
+from app.data.host_metrics import MINUTE, get_series
+from app.data.ticket_analytics import get_ticket_sla_report
+from app.services.host_collector import FIELDS, start_collector
 
 st.set_page_config(page_title="IT Operations", layout="wide")
 
 def get_conn():
-    return connect_database()
+    return get_reader()
 conn = get_conn()
 
 if not st.session_state.get("logged_in", False):
@@ -18,53 +22,97 @@ if st.sidebar.button("Logout"):
     st.session_state.logged_in = False
     st.session_state.username = ""
     st.session_state.role = ""
+    st.session_state.principal = None
     st.switch_page("Home.py")
 
 st.title("IT Operations")
 st.subheader("System monitoring and infrastructure management")
 
+st.write("### Ticket SLA")
+report = get_ticket_sla_report(conn)
+overall = report["overall"]
+col1, col2, col3 = st.columns(3)
+# Every status but Resolved and Closed, so more than the Dashboard's "Open"
+col1.metric("Unresolved Tickets", overall["open"])
+col2.metric("Median Days to Resolve",
+            "—" if overall["median_days"] is None else overall["median_days"])
+col3.metric("SLA Breach Rate",
+            "—" if overall["sla_breach_rate"] is None else f"{overall['sla_breach_rate']:.0%}")
+if report["unknown_dates"]:
+    st.caption(f"{report['unknown_dates']:,} resolved tickets have no resolved date and are left out")
+
+if overall["resolved"]:
+    st.write("#### Resolution Time by Priority")
+    st.dataframe(report["by_priority"].style.format({"mean_days": "{:.1f}", "sla_breach_rate": "{:.0%}"}),
+                 use_container_width=True)
+    st.bar_chart(report["distribution"])
+
+if overall["open"]:
+    st.write("#### Backlog Ageing by Assignee")
+    st.dataframe(report["backlog"], use_container_width=True)
+st.divider()
+
+collector = start_collector()
+if collector is None:
+    st.info("Host metrics need a Linux /proc filesystem; none is available here.")
+    st.stop()
+
 st.write("### System Health")
+latest = collector.latest()
+cpu = latest["cpu_pct"]
+if pd.isna(cpu):
+    # Only the first sample so far; a rate needs two
+    cpu_text = "—"
+else:
+    cpu_text = f"{cpu:.0f}%"
+uptime = int(latest["uptime_s"])
 col1, col2, col3 = st.columns(3)
 
 with col1:
     st.metric(
         "CPU Usage",
-        "67%",
+        cpu_text,
     )
 
 with col2:
     st.metric(
         "Memory",
-        "8.2 GB",
+        f"{latest['mem_used_mb'] / 1024:.1f} GB",
+        help=f"of {latest['mem_total_mb'] / 1024:.1f} GB",
     )
 
 with col3:
     st.metric(
         "Uptime",
-        "99.8%",
+        f"{uptime // 86400}d {uptime % 86400 // 3600}h",
     )
 
 st.divider()
 
+# Last 24 hours at one point per minute, at most 1,440 rows. Until the first
+# minute is flushed, fall back to the collector's raw samples.
+history = get_series(conn, MINUTE, since=time.time() - 24 * 3600)
+if len(history) < 2:
+    history = pd.DataFrame(collector.samples(), columns=FIELDS)
+    history.index = pd.to_datetime(history.pop("ts"), unit="s")
+
 st.write("### Resource Usage Over Time")
 usage = pd.DataFrame({
-    "time": ["00:00", "06:00", "12:00", "18:00", "23:59"],
-    "CPU": [45, 52, 78, 82, 67],
-    "Memory": [6.2, 6.8, 8.5, 9.1, 8.2]
+    "CPU %": history["cpu_pct"],
+    "Memory %": 100 * history["mem_used_mb"] / history["mem_total_mb"],
 })
 
-st.line_chart(usage, x="time", y=["CPU", "Memory"])
+st.line_chart(usage)
 st.divider()
 
 st.write("### Network Traffic")
 
 network = pd.DataFrame({
-    "hour": ["00:00", "04:00", "08:00", "12:00", "16:00", "20:00", "23:59"],
-    "incoming": [120, 90, 250, 380, 420, 340, 180],
-    "outgoing": [80, 60, 180, 280, 320, 260, 140]
+    "incoming KB/s": history["net_rx_bps"] / 1024,
+    "outgoing KB/s": history["net_tx_bps"] / 1024,
 })
 
-st.area_chart(network, x="hour", y=["incoming", "outgoing"])
+st.area_chart(network)
 st.divider()
 
 st.write("### Service Status")
@@ -82,10 +130,11 @@ with col2:
 st.divider()
 
 st.write("### Storage Usage")
+st.caption(f"Filesystem holding {collector.disk_path}")
 storage = pd.DataFrame({
-    "server": ["Server 1", "Server 2", "Server 3", "Server 4"],
-    "usage_gb": [450, 680, 320, 590]
+    "space": ["Used", "Free"],
+    "gb": [latest["disk_used_gb"], latest["disk_total_gb"] - latest["disk_used_gb"]]
 })
 
-st.bar_chart(storage, x="server", y="usage_gb")
+st.bar_chart(storage, x="space", y="gb")
 st.divider()
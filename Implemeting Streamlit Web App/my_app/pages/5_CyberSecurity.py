@@ -1,12 +1,13 @@
 import streamlit as st
-import pandas as pd
-from app.data.db import connect_database
-from app.data.incidents import get_all_incidents
+from app.data.db import get_reader
+from app.data.incidents import get_incidents_page
+from app.data.metrics import get_incident_metrics, VULNERABILITY_SEVERITIES
+from app.data.rollups import get_incident_trend, get_period_deltas, get_hourly_counts
 
 st.set_page_config(page_title="Cybersecurity", layout="wide")
 
 def get_conn():
-    return connect_database()
+    return get_reader()
 conn = get_conn()
 
 if not st.session_state.get("logged_in", False):
@@ -20,51 +21,57 @@ if st.sidebar.button("Logout"):
     st.session_state.logged_in = False
     st.session_state.username = ""
     st.session_state.role = ""
+    st.session_state.principal = None
     st.switch_page("Home.py")
 
 st.title("Cybersecurity")
 st.subheader("Security metrics and threat monitoring")
 
+metrics = get_incident_metrics(conn)
+deltas = get_period_deltas(conn, "month")
+vulnerabilities_delta = None
+incidents_delta = None
+if deltas is not None:
+    current, previous = deltas["current"], deltas["previous"]
+    severe = current.index.isin(VULNERABILITY_SEVERITIES)
+    vulnerabilities_delta = int(current[severe].sum() - previous[severe].sum())
+    incidents_delta = int(current.sum() - previous.sum())
+
 st.write("### Security Metrics")
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("Threats Detected", 247, delta="+12")
+    st.metric("Threats Detected", metrics["threats_detected"])
 
 with col2:
-    st.metric("Vulnerabilities", 8, delta="-3")
+    st.metric("Vulnerabilities", metrics["vulnerabilities"], delta=vulnerabilities_delta, delta_color="inverse")
 
 with col3:
-    st.metric("Incidents", 3, delta="+1")
+    st.metric("Incidents", metrics["total"], delta=incidents_delta, delta_color="inverse")
+if deltas is not None:
+    st.caption(f"Changes are new incidents in {deltas['period']} against {deltas['previous_period']}")
 st.divider()
 
 st.write("### Threat Distribution")
-threat_data = pd.DataFrame({
-    "threat_type": ["Malware", "Phishing", "DDoS", "Intrusion"],
-    "count": [89, 67, 45, 46]
-})
-
-st.bar_chart(threat_data, x="threat_type", y="count")
+if metrics["total"] > 0:
+    st.bar_chart(metrics["by_type"])
+else:
+    st.info("No data available.")
 st.divider()
 
 st.write("### Threat Trends")
 
-trends = pd.DataFrame({
-    "month": ["Jan", "Feb", "Mar", "Apr", "May", "Jun"],
-    "Malware": [45, 52, 61, 58, 73, 89],
-    "Phishing": [32, 41, 38, 45, 55, 67],
-    "DDoS": [28, 25, 31, 35, 42, 45]
-})
-
-st.line_chart(trends, x="month", y=["Malware", "Phishing", "DDoS"])
+trends = get_incident_trend(conn, "month", by="incident_type", periods=12)
+if len(trends) > 0:
+    st.line_chart(trends)
+else:
+    st.info("No data available.")
 st.divider()
 
 st.write("### Attack Patterns by Hour")
-attack_hours = pd.DataFrame({
-    "hour": ["00:00", "04:00", "08:00", "12:00", "16:00", "20:00"],
-    "attacks": [15, 8, 25, 42, 38, 28]
-})
-
-st.area_chart(attack_hours, x="hour", y="attacks")
+st.caption("By the hour each incident was recorded")
+attack_hours = get_hourly_counts(conn).rename("attacks")
+attack_hours.index = attack_hours.index + ":00"
+st.area_chart(attack_hours)
 st.divider()
 
 st.write("### Security Status")
@@ -82,20 +89,18 @@ with col2:
 st.divider()
 
 st.write("### Recent Security Incidents")
-incidents = get_all_incidents(conn)
-df = pd.DataFrame(incidents)
+df = get_incidents_page(conn, limit=5).rows
 
 if len(df) > 0:
-    recent = df.head(5)[['date', 'incident_type', 'severity', 'status']]
+    recent = df[['date', 'incident_type', 'severity', 'status']]
     st.dataframe(recent, use_container_width=True)
 else:
     st.info("No recent incidents.")
 st.divider()
 st.write("### Incidents by Severity")
 
-if len(df) > 0:
-    severity_data = df['severity'].value_counts()
-    st.bar_chart(severity_data)
+if metrics["total"] > 0:
+    st.bar_chart(metrics["by_severity"])
 else:
     st.info("No data available.")
 st.divider()
@@ -1,97 +1,290 @@
-import bcrypt
+import argparse
+import csv
+from credential_cache import CredentialCache
+import kdf
+import metrics
+from breach_index import BreachIndex
 import os
-import secrets
-import time
+import threading
+import user_file
+from user_store import UserStore
+from rate_limiter import RateLimiter
+from session_store import SessionStore
+from tokens import TokenSigner
+from verify_pool import VerifyPool
 
-sessions = {}
 USER_DATA_FILE = "users.txt"
+SESSION_LOG_FILE = "sessions.log"
+TOKEN_KEY_FILE = "token_keys.json"
+BREACH_INDEX_FILE = "breached_passwords.idx"
+BREACH_BLOOM_FILE = "breached_passwords.bloom"
+KDF_CONFIG_FILE = "kdf.json"
+
+# Loaded once, then only appended lines are read on later lookups
+user_store = UserStore(USER_DATA_FILE)
+
+# Off by default; enable_credential_cache() or --cache-ttl turns it on
+credential_cache = None
+
+ROLES = ["user", "admin", "analyst"]
+
+SESSION_IDLE_TIMEOUT = 30 * 60
+SESSION_MAX_AGE = 8 * 60 * 60
+MAX_SESSIONS_PER_USER = 5
 
-wrong_attempts = {}
 LOCK_DURATION = 300
 MAX_ATTEMPTS = 3
+# Per-source budget is looser so one office behind a NAT isn't locked out by a typo
+MAX_SOURCE_ATTEMPTS = 20
+MAX_TRACKED_KEYS = 100000
 
+# Failed-login counters, bounded to MAX_TRACKED_KEYS entries each
+user_limiter = RateLimiter(MAX_ATTEMPTS, LOCK_DURATION, capacity=MAX_TRACKED_KEYS)
+source_limiter = RateLimiter(MAX_SOURCE_ATTEMPTS, LOCK_DURATION, capacity=MAX_TRACKED_KEYS)
 
-def hash_password(plain_text_password):
-    # Encode the password to bytes (bcrypt requires byte strings)
-    password_in_bytes = plain_text_password.encode('utf-8')
+# The parts below start threads or touch files in the working directory, so
+# they are built on first use by their get_*() accessor rather than at import
+_UNSET = object()
+_kdf_policy = _UNSET
+_breach_index = _UNSET
+_verify_pool = _UNSET
+_sessions = _UNSET
+_token_signer = _UNSET
+_lazy_lock = threading.Lock()
 
-    # Generate a salt using bcrypt.gensalt()
-    salt = bcrypt.gensalt()
 
-    # Hash the password using bcrypt.hashpw()
-    hashed_pass = bcrypt.hashpw(password_in_bytes, salt)
+def _lazy(name, factory):
+    value = globals()[name]
+    if value is _UNSET:
+        with _lazy_lock:
+            value = globals()[name]
+            if value is _UNSET:
+                value = globals()[name] = factory()
+    return value
 
-    # Decode the hash back to a string to store in a text file
-    return hashed_pass.decode('utf-8')
 
+def get_kdf_policy():
+    # Tuned hash parameters written by `python auth.py --calibrate`
+    return _lazy("_kdf_policy", lambda: kdf.load_policy(KDF_CONFIG_FILE))
 
-def verify_password(plain_text_password, hashed_password):
-    # This function extracts the salt from the hash and compares
 
-    # Encode both values to bytes
-    password_bytes = plain_text_password.encode('utf-8')
-    hashed_bytes = hashed_password.encode('utf-8')
+def get_breach_index():
+    # Known-compromised passwords, built with `python breach_index.py build ...`
+    return _lazy("_breach_index", lambda: BreachIndex(BREACH_INDEX_FILE, BREACH_BLOOM_FILE)
+                 if os.path.exists(BREACH_INDEX_FILE) else None)
 
-    # Validate password using bcrypt
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
 
+def get_verify_pool():
+    # Shared bcrypt workers, one per core by default
+    get_kdf_policy()
+    return _lazy("_verify_pool", VerifyPool)
 
-def register_user(username, password, role="user"):
+
+def get_sessions():
+    # Replayed from SESSION_LOG_FILE so a restart doesn't log everyone out
+    return _lazy("_sessions", lambda: SessionStore(
+        SESSION_LOG_FILE, idle_timeout=SESSION_IDLE_TIMEOUT,
+        absolute_timeout=SESSION_MAX_AGE, max_per_user=MAX_SESSIONS_PER_USER))
+
+
+def get_token_signer():
+    # Signing keys for stateless tokens, created on first run
+    return _lazy("_token_signer", lambda: TokenSigner.from_file(TOKEN_KEY_FILE, ttl=SESSION_MAX_AGE))
+
+
+def enable_credential_cache(ttl=60, max_entries=10000):
+    """Let repeat logins with unchanged credentials skip the hash for ttl seconds."""
+    global credential_cache
+    credential_cache = CredentialCache(ttl, max_entries)
+    return credential_cache
+
+
+def hash_password(plain_text_password):
+    # Hash with the current KDF policy (bcrypt by default, see kdf.py)
+    get_kdf_policy()
+    return kdf.hash_password(plain_text_password)
+
+
+def verify_password(plain_text_password, hashed_password):
+    # The stored hash says which KDF and cost made it, so old hashes keep working
+    get_kdf_policy()
+    return kdf.verify_password(plain_text_password, hashed_password)
+
+
+def create_user(username, password, role="user"):
+    """Register without printing; returns (success, message)."""
     # Check if user already exists
-    if user_exists(username):
-        print(f"Error: Username '{username}' already exists.")
-        return False
+    with metrics.timer("register.lookup"):
+        exists = user_exists(username)
+    if exists:
+        metrics.count("register_failure")
+        return False, f"Error: Username '{username}' already exists."
 
     # Hash the password
-    hashed = hash_password(password)
+    with metrics.timer("register.hash"):
+        hashed = hash_password(password)
+
+    # Check again under the file lock: another process may have registered
+    # the same name while we were hashing. Only the check and one append
+    # happen under the lock, so writers don't queue behind each other's bcrypt.
+    with metrics.timer("register.write"):
+        with user_file.locked(USER_DATA_FILE):
+            if user_exists(username):
+                metrics.count("register_failure")
+                return False, f"Error: Username '{username}' already exists."
+            user_file.append_record(USER_DATA_FILE, username, hashed, role)
+
+    metrics.count("register_success")
+    return True, f"Success: User ''{username}' registered as '{role}' Successfully."
+
+
+def register_user(username, password, role="user"):
+    success, message = create_user(username, password, role)
+    print(message)
+    return success
 
-    # Append new user to file in format: username,hash
-    with open(USER_DATA_FILE, "a") as file:
-        file.write(f"{username},{hashed},{role}\n")
 
-    print(f"Success: User ''{username}' registered as '{role}' Successfully.")
+def register_users_batch(csv_path):
+    """Register every row of a username,password,role CSV in one go.
+
+    Rows are validated and de-duplicated up front, the passwords are hashed
+    on the verify pool and all new users land in users.txt in one atomic
+    write. Returns one report entry per CSV row.
+    """
+    report = []
+    accepted = []
+    seen = set()
+
+    with open(csv_path, newline="", encoding="utf-8") as file:
+        # Line 1 is the header, so data rows start at 2
+        for row_number, row in enumerate(csv.DictReader(file), start=2):
+            username = (row.get("username") or "").strip()
+            password = (row.get("password") or "").strip()
+            role = (row.get("role") or "").strip().lower()
+            if role not in ROLES:
+                role = "user"
+
+            is_valid, error_msg = validate_username(username)
+            if is_valid:
+                is_valid, error_msg = validate_password(password)
+            if is_valid and (username in seen or user_exists(username)):
+                is_valid, error_msg = False, f"Error: Username '{username}' already exists."
+
+            entry = {"row": row_number, "username": username, "role": role, "ok": is_valid, "message": error_msg}
+            report.append(entry)
+            if is_valid:
+                seen.add(username)
+                accepted.append((entry, password))
+
+    if not accepted:
+        return report
+
+    hashes = get_verify_pool().hash_many([password for _, password in accepted])
+    records = []
+    with user_file.locked(USER_DATA_FILE):
+        # Names taken by another process since validation fail here instead
+        for (entry, _), hashed in zip(accepted, hashes):
+            if user_exists(entry["username"]):
+                entry["ok"] = False
+                entry["message"] = f"Error: Username '{entry['username']}' already exists."
+            else:
+                records.append((entry["username"], hashed, entry["role"]))
+        if records:
+            user_file.append_records(USER_DATA_FILE, records)
+
+    for entry, _ in accepted:
+        if entry["ok"]:
+            entry["message"] = f"Success: User '{entry['username']}' registered as '{entry['role']}'."
+    return report
+
+
+def update_user_hash(username, new_hash):
+    # Appends a record with the new hash; the last record for a username
+    # wins, and `user_file.py compact` drops the superseded ones
+    with user_file.locked(USER_DATA_FILE):
+        role = user_store.get_role(username)
+        if role is None:
+            return False
+        user_file.append_record(USER_DATA_FILE, username, new_hash, role)
+    if credential_cache is not None:
+        credential_cache.invalidate(username)
     return True
 
 
+def _rehash_if_outdated(username, password, stored_hash):
+    # Only possible right after a successful login, while we hold the plain
+    # password. The new hash is made on the pool and written when it's done,
+    # so the login that triggered it doesn't wait for it.
+    get_kdf_policy()
+    if not kdf.needs_rehash(stored_hash):
+        return
+
+    def store(future):
+        try:
+            new_hash = future.result()
+            # Another login may have upgraded the hash meanwhile
+            record = user_store.get(username)
+            if record is not None and record[0] == stored_hash:
+                update_user_hash(username, new_hash)
+        except Exception as e:
+            print(f"Error upgrading the password hash of '{username}': {e}")
+
+    get_verify_pool().submit_hash(password).add_done_callback(store)
+
+
+def import_users(csv_path):
+    report = register_users_batch(csv_path)
+    failed = [entry for entry in report if not entry["ok"]]
+
+    for entry in failed:
+        print(f"Row {entry['row']} ({entry['username'] or '<blank>'}): {entry['message']}")
+    print(f"Imported {len(report) - len(failed)} of {len(report)} users, {len(failed)} failed.")
+    return report
+
+
 def user_exists(username):
-    # If file does not exist → no users yet
-    if not os.path.exists(USER_DATA_FILE):
-        return False
+    # Index lookup instead of scanning users.txt line by line
+    return user_store.exists(username)
 
-    # Read file and check each line
-    with open(USER_DATA_FILE, "r") as file:
-        for line in file:
-            stored_username = line.strip().split(",")[0]  # username is before the comma
-            if stored_username == username:
-                return True
 
-    return False
+def get_user_role(username):
+    return user_store.get_role(username)
 
 
-def login_user(username, password):
+def check_credentials(username, password):
+    """Verify a password without printing; returns (success, message)."""
     if not os.path.exists(USER_DATA_FILE):
-        print("Error: No users are registered yet.")
-        return False
+        return False, "Error: No users are registered yet."
 
-    with open(USER_DATA_FILE, "r") as file:
-        for line in file:
-            parts = line.strip().split(",")
-            if len(parts) < 2:
-                continue
+    with metrics.timer("login.lookup"):
+        record = user_store.get(username)
+    if record is None:
+        return False, "Error: Username not found."
+
+    stored_hash, _ = record
+    if credential_cache is not None:
+        if credential_cache.check(username, password, stored_hash):
+            metrics.count("credential_cache_hit")
+            return True, f"Success: Welcome '{username}'!."
+        metrics.count("credential_cache_miss")
 
-            stored_username = parts[0]
-            stored_hash = parts[1]
+    # Runs on the shared pool so concurrent callers queue for a bounded set of cores
+    with metrics.timer("login.verify"):
+        verified = get_verify_pool().submit_verify(password, stored_hash).result()
+    if verified:
+        _rehash_if_outdated(username, password, stored_hash)
+        if credential_cache is not None:
+            # A pending rehash invalidates this entry once its record is written
+            credential_cache.add(username, password, stored_hash)
+        return True, f"Success: Welcome '{username}'!."
 
-            if stored_username == username:
-                if verify_password(password, stored_hash):
-                    print(f"Success: Welcome '{username}'!.")
-                    return True
-                else:
-                    print("Error: Invalid password.")
-                    return False
+    return False, "Error: Invalid password."
 
-    print("Error: Username not found.")
-    return False
+
+def login_user(username, password):
+    success, message = check_credentials(username, password)
+    print(message)
+    return success
 
 
 def validate_username(username):
@@ -114,6 +307,11 @@ def validate_password(password):
     if not any(c.isalpha() for c in password):
         return False, "Password must contain at least one letter."
 
+    # Local lookup, the password never leaves this machine
+    breach_index = get_breach_index()
+    if breach_index is not None and password in breach_index:
+        return False, "Error: This password has appeared in a data breach. Choose another one."
+
     return True, ""
 
 
@@ -146,41 +344,140 @@ def check_password_strength(password):
         return "Strong"
 
 
-def login_user_with_lock(username, password):
-    if username in wrong_attempts:
-        count, lock_time = wrong_attempts[username]
-        if count >= MAX_ATTEMPTS:
-            if time.time() - lock_time < LOCK_DURATION:
-                print(f"Account '{username}' is locked. Try again later.")
-                return False
-            else:
-                # Reset after lock duration
-                wrong_attempts[username] = (0, 0)
-
-    success = login_user(username, password)
+def _lock_message(username, source=None):
+    # Checked before any file I/O or bcrypt work
+    if user_limiter.locked_for(username):
+        return f"Account '{username}' is locked. Try again later."
+    if source is not None and source_limiter.locked_for(source):
+        return f"Too many failed attempts from '{source}'. Try again later."
+    return None
+
+
+def _reserve_attempt(username):
+    # Claims one of the account's attempts before bcrypt runs, so concurrent
+    # logins for one user can't make more guesses than MAX_ATTEMPTS
+    if user_limiter.reserve(username):
+        return None
+    return f"Account '{username}' is locked. Try again later."
+
+
+def _record_attempt(username, success, source=None):
+    # Settles the attempt claimed by _reserve_attempt
+    if success:
+        # Reset on successful login; the source budget only drains with time
+        user_limiter.reset(username)
+        return None
+
+    if source is not None:
+        source_limiter.record_failure(source)
+    if user_limiter.record_failure(username, reserved=True):
+        return f"Account' {username}' is now locked for 5 minutes."
+    return None
+
+
+def authenticate(username, password, source=None):
+    """Login with lockout, without printing; returns (success, messages)."""
+    with metrics.timer("login.lockout_check"):
+        locked = _lock_message(username, source) or _reserve_attempt(username)
+    if locked:
+        metrics.count("login_rejected_locked")
+        return False, [locked]
+
+    try:
+        success, message = check_credentials(username, password)
+    except Exception:
+        user_limiter.release(username)
+        raise
+    with metrics.timer("login.lockout_record"):
+        now_locked = _record_attempt(username, success, source)
+    metrics.count("login_success" if success else "login_failure")
+    if now_locked:
+        metrics.count("lockouts")
+        return success, [message, now_locked]
+    return success, [message]
+
+
+def login_user_with_lock(username, password, source=None):
+    success, messages = authenticate(username, password, source)
+    for message in messages:
+        print(message)
+    return success
 
-    if not success:
-        if username not in wrong_attempts:
-            wrong_attempts[username] = (1, 0)
-        else:
-            count, _ = wrong_attempts[username]
-            if count + 1 >= MAX_ATTEMPTS:
-                wrong_attempts[username] = (count + 1, time.time())
-                print(f"Account' {username}' is now locked for 5 minutes.")
-            else:
-                wrong_attempts[username] = (count + 1, 0)
-    else:
-        # Reset on successful login
-        if username in wrong_attempts:
-            wrong_attempts.pop(username)
 
-    return success
+def login_users_with_lock(credentials, source=None):
+    # Fan a burst of (username, password) logins out over the verify pool.
+    # Each submission reserves one of the user's attempts, so a batch never
+    # verifies more guesses for a user than they have left.
+    pending = []
+    for username, password in credentials:
+        locked = _lock_message(username, source) or _reserve_attempt(username)
+        if locked:
+            print(locked)
+            metrics.count("login_rejected_locked")
+            pending.append((username, password, True, None, None))
+            continue
+        record = user_store.get(username)
+        stored_hash = record[0] if record else None
+        # Unknown usernames resolve to a failed attempt without touching bcrypt
+        future = get_verify_pool().submit_verify(password, stored_hash) if record else None
+        pending.append((username, password, False, stored_hash, future))
+
+    results = []
+    for username, password, locked, stored_hash, future in pending:
+        if locked:
+            results.append(False)
+            continue
+        success = future.result() if future else False
+        if user_limiter.locked_for(username):
+            # An earlier result in this batch locked the account; a correct
+            # password arriving after that must not count or clear the lock
+            user_limiter.release(username)
+            print(_lock_message(username))
+            metrics.count("login_rejected_locked")
+            results.append(False)
+            continue
+        if success:
+            _rehash_if_outdated(username, password, stored_hash)
+        metrics.count("login_success" if success else "login_failure")
+        now_locked = _record_attempt(username, success, source)
+        if now_locked:
+            metrics.count("lockouts")
+            print(now_locked)
+        results.append(success)
+    return results
 
 
 def create_session(username):
-    token = secrets.token_hex(16)
-    sessions[username] = token
-    return token
+    with metrics.timer("login.session"):
+        return get_sessions().create(username, get_user_role(username))
+
+
+def validate_session(token):
+    # Returns the Session (username, role, ...) or None if unknown or expired
+    return get_sessions().validate(token)
+
+
+def refresh_session(token):
+    return get_sessions().refresh(token)
+
+
+def revoke_session(token):
+    return get_sessions().revoke(token)
+
+
+def create_signed_token(username):
+    # Self-contained alternative to create_session(); checked without any lookup
+    with metrics.timer("login.session"):
+        return get_token_signer().issue(username, get_user_role(username) or "user")
+
+
+def validate_signed_token(token):
+    # TokenClaims (username, role, expires, token_id) or None
+    return get_token_signer().verify(token)
+
+
+def revoke_signed_token(token):
+    return get_token_signer().revoke(token)
 
 
 def main():
@@ -215,7 +512,7 @@ def main():
 
             #Validate Role
             role = input("Enter role (user/admin/analyst) [default: user]: ").strip().lower()
-            if role not in ["user", "admin", "analyst"]:
+            if role not in ROLES:
                 role = "user"
 
             register_user(username, password, role)
@@ -239,4 +536,48 @@ def main():
             print("\nError: Invalid option. Please select 1, 2, or 3.")
 
 
-main()
+def calibrate_kdf(target_ms, algorithm):
+    # Start from the saved policy, so settings for the other algorithm are kept
+    get_kdf_policy()
+    result = kdf.calibrate(target_ms, algorithm)
+    kdf.save_policy(KDF_CONFIG_FILE)
+    details = ", ".join(f"{key}={value}" for key, value in result.items() if key != "ms")
+    print(f"Calibrated {details} ({result['ms']:.0f} ms per hash), saved to {KDF_CONFIG_FILE}.")
+    print("Existing hashes are upgraded the next time each user logs in.")
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Secure Authentication System")
+    parser.add_argument("--import", dest="import_csv", metavar="CSV",
+                        help="bulk-register users from a username,password,role CSV")
+    parser.add_argument("--calibrate", type=int, metavar="MS",
+                        help="pick the KDF cost that takes about MS milliseconds per hash on this host")
+    parser.add_argument("--algorithm", choices=["bcrypt", "scrypt"], default="bcrypt",
+                        help="KDF to calibrate (default: bcrypt)")
+    parser.add_argument("--cache-ttl", type=int, metavar="SECONDS",
+                        help="remember verified logins for SECONDS so repeats skip the hash")
+    parser.add_argument("--metrics", metavar="PROM_FILE", nargs="?", const="",
+                        help="time each register/login phase; print a summary on exit and "
+                             "optionally write Prometheus text to PROM_FILE")
+    args = parser.parse_args()
+
+    if args.metrics is not None:
+        metrics.enable()
+    if args.cache_ttl:
+        enable_credential_cache(args.cache_ttl)
+
+    if args.import_csv:
+        import_users(args.import_csv)
+    elif args.calibrate:
+        calibrate_kdf(args.calibrate, args.algorithm)
+    else:
+        main()
+
+    if args.metrics is not None:
+        metrics.dump()
+        if args.metrics:
+            metrics.write_prometheus(args.metrics)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import auth
+import metrics
+from tokens import TOKEN_VERSION
+
+SOCKET_PATH = "auth.sock"
+# Requests a single connection may have in flight before we stop reading from it
+MAX_IN_FLIGHT = 256
+
+# Protocol: one JSON object per line in each direction. Every request carries
+# an "op" and an optional "id"; the response echoes the id. Requests on one
+# connection may be pipelined and responses can come back out of order.
+#
+#   {"id": 1, "op": "register", "username": "...", "password": "...", "role": "user"}
+#   {"id": 2, "op": "login", "username": "...", "password": "...", "token": "session" | "signed"}
+#   {"id": 3, "op": "validate_session", "token": "..."}
+#   {"id": 4, "op": "logout", "token": "..."}
+#   {"id": 5, "op": "ping"}
+#   {"id": 6, "op": "metrics"}   → {"ok": true, "text": "<Prometheus text format>"}
+#
+# Responses: {"id": ..., "ok": true, ...} or {"id": ..., "ok": false, "error": "..."}
+
+
+def _register(request):
+    username = request.get("username", "")
+    password = request.get("password", "")
+    role = request.get("role", "user")
+    if role not in auth.ROLES:
+        role = "user"
+
+    for is_valid, error_msg in (auth.validate_username(username), auth.validate_password(password)):
+        if not is_valid:
+            return {"ok": False, "error": error_msg}
+    success, message = auth.create_user(username, password, role)
+    if not success:
+        return {"ok": False, "error": message}
+    return {"ok": True, "message": message}
+
+
+def _login(request):
+    username = request.get("username", "")
+    success, messages = auth.authenticate(username, request.get("password", ""), request.get("source"))
+    if not success:
+        return {"ok": False, "error": " ".join(messages)}
+
+    if request.get("token") == "signed":
+        token = auth.create_signed_token(username)
+    else:
+        token = auth.create_session(username)
+    return {"ok": True, "token": token, "role": auth.get_user_role(username)}
+
+
+def _validate_session(request):
+    token = request.get("token")
+    if not isinstance(token, str) or not token:
+        return {"ok": False, "error": "Missing or invalid token."}
+    if token.startswith(TOKEN_VERSION + "."):
+        claims = auth.validate_signed_token(token)
+    else:
+        claims = auth.validate_session(token)
+    if claims is None:
+        return {"ok": False, "error": "Invalid or expired session."}
+    return {"ok": True, "username": claims.username, "role": claims.role}
+
+
+def _logout(request):
+    token = request.get("token")
+    if not isinstance(token, str) or not token:
+        return {"ok": False, "error": "Missing or invalid token."}
+    if token.startswith(TOKEN_VERSION + "."):
+        return {"ok": auth.revoke_signed_token(token)}
+    return {"ok": auth.revoke_session(token)}
+
+
+# Ops that hash or verify a password run on the executor; the rest are
+# in-memory lookups cheap enough to answer straight from the event loop
+BLOCKING_OPS = {"register": _register, "login": _login}
+INLINE_OPS = {
+    "validate_session": _validate_session,
+    "logout": _logout,
+    "ping": lambda request: {"ok": True},
+    "metrics": lambda request: {"ok": True, "text": metrics.render_prometheus()},
+}
+
+
+class AuthServer:
+    def __init__(self, path=SOCKET_PATH, workers=None, metrics_file=None, metrics_interval=15):
+        self.path = path
+        self.metrics_file = metrics_file
+        self.metrics_interval = metrics_interval
+        # Enough threads to keep the verify pool's queue full
+        self.executor = ThreadPoolExecutor(max_workers=workers or auth.get_verify_pool().max_pending)
+
+    async def _dispatch(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return {"ok": False, "error": f"Bad request: {e}"}
+
+        op = request.get("op")
+        try:
+            if op in INLINE_OPS:
+                response = INLINE_OPS[op](request)
+            elif op in BLOCKING_OPS:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(self.executor, BLOCKING_OPS[op], request)
+            else:
+                response = {"ok": False, "error": f"Unknown op: {op}"}
+        except Exception as e:
+            response = {"ok": False, "error": f"Internal error: {e}"}
+
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def _respond(self, line, writer, slots):
+        try:
+            response = await self._dispatch(line)
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            slots.release()
+
+    async def handle_client(self, reader, writer):
+        slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+        tasks = set()
+        try:
+            while True:
+                # Backpressure: a client that floods us waits here, not in memory
+                await slots.acquire()
+                line = await reader.readline()
+                if not line:
+                    slots.release()
+                    break
+                task = asyncio.create_task(self._respond(line, writer, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self.handle_client, path=self.path)
+        # Only this user may talk to the daemon
+        os.chmod(self.path, 0o600)
+        print(f"Auth daemon listening on {self.path}")
+        exporter = asyncio.create_task(self._export_metrics()) if self.metrics_file else None
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                if exporter:
+                    exporter.cancel()
+                os.unlink(self.path)
+                self.executor.shutdown(wait=False)
+
+    async def _export_metrics(self):
+        # Rewritten periodically for a node_exporter textfile collector to pick up
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            metrics.write_prometheus(self.metrics_file)
+
+
+class AuthClient:
+    """Small blocking client for other local services."""
+
+    def __init__(self, path=SOCKET_PATH):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+        self._file = self._sock.makefile("rwb")
+        self._next_id = 0
+
+    def call_many(self, requests):
+        # Pipeline the requests, then collect the answers in request order.
+        # Batches stay under the server's in-flight limit so neither side can
+        # end up blocked on a full socket buffer.
+        requests = list(requests)
+        results = []
+        for start in range(0, len(requests), MAX_IN_FLIGHT):
+            ids = []
+            for request in requests[start:start + MAX_IN_FLIGHT]:
+                self._next_id += 1
+                ids.append(self._next_id)
+                self._file.write(json.dumps(dict(request, id=self._next_id)).encode("utf-8") + b"\n")
+            self._file.flush()
+
+            responses = {}
+            while len(responses) < len(ids):
+                response = json.loads(self._file.readline())
+                responses[response.get("id")] = response
+            results.extend(responses[i] for i in ids)
+        return results
+
+    def call(self, op, **params):
+        return self.call_many([dict(params, op=op)])[0]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local authentication daemon")
+    parser.add_argument("--socket", default=SOCKET_PATH, help=f"Unix socket path (default: {SOCKET_PATH})")
+    parser.add_argument("--workers", type=int, help="executor threads for register/login")
+    parser.add_argument("--cache-ttl", type=int, metavar="SECONDS",
+                        help="remember verified logins for SECONDS so repeats skip the hash")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="enable instrumentation and write Prometheus text to PATH every 15s")
+    args = parser.parse_args()
+
+    if args.metrics_file:
+        metrics.enable()
+    if args.cache_ttl:
+        auth.enable_credential_cache(args.cache_ttl)
+    try:
+        asyncio.run(AuthServer(args.socket, args.workers, args.metrics_file).serve())
+    except KeyboardInterrupt:
+        print("\nAuth daemon stopped.")
+
+
+if __name__ == "__main__":
+    main()
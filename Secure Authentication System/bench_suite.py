@@ -0,0 +1,218 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import bcrypt
+
+PASSWORD = "Password1"
+
+
+def write_user_file(path, count, cost):
+    # One real hash shared by every user: bcrypt cost per login is the same
+    # as with unique salts, and generating millions of hashes would take hours
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(cost)).decode("utf-8")
+    with open(path, "w") as file:
+        for i in range(count):
+            file.write(f"user{i},{hashed},user\n")
+
+
+def measure(func, args_list):
+    """Run func once per args tuple; return throughput and latency percentiles."""
+    samples = []
+    start = time.perf_counter()
+    for args in args_list:
+        t0 = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def summarize(samples, elapsed):
+    samples.sort()
+    return {
+        "ops": len(samples),
+        "ops_per_s": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+
+class Suite:
+    def __init__(self, auth, workdir, cost, iterations, threads, seed):
+        self.auth = auth
+        self.workdir = workdir
+        self.cost = cost
+        self.iterations = iterations
+        self.threads = threads
+        self.rng = random.Random(seed)
+        self.size = 0
+
+    def use_population(self, size):
+        # Point the auth module at a fresh synthetic users.txt
+        auth = self.auth
+        path = os.path.join(self.workdir, f"users-{size}.txt")
+        write_user_file(path, size, self.cost)
+        auth.USER_DATA_FILE = path
+        auth.user_store = auth.UserStore(path)
+        auth.user_limiter = auth.RateLimiter(auth.MAX_ATTEMPTS, auth.LOCK_DURATION, capacity=auth.MAX_TRACKED_KEYS)
+        self.size = size
+
+    def existing(self, n):
+        return [(f"user{self.rng.randrange(self.size)}",) for _ in range(n)]
+
+    def run(self):
+        auth, n = self.auth, self.iterations
+        results = {}
+
+        def cold_lookup(username):
+            auth.user_store = auth.UserStore(auth.USER_DATA_FILE)
+            auth.user_exists(username)
+
+        results["user_exists_cold"] = measure(cold_lookup, self.existing(max(1, n // 50)))
+        results["user_exists_hit"] = measure(auth.user_exists, self.existing(n * 20))
+        results["user_exists_miss"] = measure(auth.user_exists, [(f"ghost{i}",) for i in range(n * 20)])
+
+        logins = [(u, PASSWORD) for (u,) in self.existing(n)]
+        results["login_user_hit"] = measure(auth.login_user, logins)
+        results["login_user_wrong_password"] = measure(auth.login_user, [(u, "wrong1") for u, _ in logins])
+        results["login_user_unknown"] = measure(auth.login_user, [(f"ghost{i}", PASSWORD) for i in range(n)])
+
+        start = self.size
+        results["register_user"] = measure(auth.register_user, [(f"new{start + i}", PASSWORD) for i in range(n)])
+
+        # Lockout storm: enough wrong guesses to lock a batch of accounts, then
+        # keep hammering them; the second phase must never reach bcrypt
+        victims = [u for (u,) in self.existing(max(1, n // 3))]
+        storm = [(u, "wrong1") for u in victims for _ in range(auth.MAX_ATTEMPTS)]
+        results["lockout_storm_locking"] = measure(auth.login_user_with_lock, storm)
+        results["lockout_storm_rejected"] = measure(auth.login_user_with_lock, storm * 10)
+
+        results["parallel_login"] = self.parallel_logins(logins)
+        return results
+
+    def parallel_logins(self, logins):
+        auth = self.auth
+        samples = []
+        lock = threading.Lock()
+        chunks = [logins[i::self.threads] for i in range(self.threads)]
+
+        def worker(chunk):
+            local = []
+            for username, password in chunk:
+                t0 = time.perf_counter()
+                auth.login_user(username, password)
+                local.append(time.perf_counter() - t0)
+            with lock:
+                samples.extend(local)
+
+        threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result = summarize(samples, time.perf_counter() - start)
+        result["threads"] = self.threads
+        return result
+
+
+# Latency changes smaller than this are timer noise on microsecond scenarios
+MIN_LATENCY_DELTA_MS = 0.01
+
+
+def compare(results, baseline, threshold):
+    """Regressions: throughput down or p50 latency up by more than threshold."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["ops_per_s"] < previous["ops_per_s"] * (1 - threshold):
+            regressions.append(f"{name}: {current['ops_per_s']:.1f} ops/s vs baseline {previous['ops_per_s']:.1f}")
+        slower = current["p50_ms"] - previous["p50_ms"]
+        if current["p50_ms"] > previous["p50_ms"] * (1 + threshold) and slower > MIN_LATENCY_DELTA_MS:
+            regressions.append(f"{name}: p50 {current['p50_ms']:.3f} ms vs baseline {previous['p50_ms']:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auth benchmark suite over synthetic user populations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000], help="users.txt sizes")
+    parser.add_argument("--cost", type=int, default=4, help="bcrypt cost for the synthetic users")
+    parser.add_argument("--iterations", type=int, default=50, help="operations per scenario")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="threads for parallel logins")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", default="bench_results.json", help="where to write the results JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed relative regression before failing (default 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # auth.py keeps its state files relative to the working directory,
+        # so importing it from a scratch dir keeps the real ones untouched
+        os.chdir(workdir)
+        sys.path.insert(0, here)
+        import auth
+        import kdf
+
+        kdf.policy.update(algorithm="bcrypt", bcrypt_rounds=args.cost)
+        suite = Suite(auth, workdir, args.cost, args.iterations, args.threads, args.seed)
+
+        results = {}
+        with open(os.devnull, "w") as devnull:
+            for size in args.sizes:
+                print(f"Running scenarios with {size} users...", file=sys.stderr)
+                suite.use_population(size)
+                with contextlib.redirect_stdout(devnull):
+                    for name, result in suite.run().items():
+                        results[f"{name}@{size}"] = result
+        auth.get_verify_pool().shutdown()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "cost": args.cost,
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"{'scenario':<36} {'ops/s':>12} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<36} {result['ops_per_s']:>12.1f} {result['p50_ms']:>10.3f} {result['p99_ms']:>10.3f}")
+    print(f"\nResults written to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from breach_index import RECORD_SIZE, BreachIndex, build_bloom
+from rate_limiter import RateLimiter
+from session_store import SessionStore
+from tokens import TokenSigner
+from user_store import UserStore
+
+# Shape of a real bcrypt hash; lookups never verify it so it doesn't need to be valid
+FAKE_HASH = "$2b$12$" + "x" * 53
+
+
+def write_synthetic_users(path, count):
+    with open(path, "w") as file:
+        for i in range(count):
+            file.write(f"user{i},{FAKE_HASH},user\n")
+
+
+def scan_user_exists(path, username):
+    # The original user_exists(): walk the file until the name turns up
+    with open(path, "r") as file:
+        for line in file:
+            if line.strip().split(",")[0] == username:
+                return True
+    return False
+
+
+def time_per_call(func, names):
+    start = time.perf_counter()
+    for name in names:
+        func(name)
+    return (time.perf_counter() - start) / len(names)
+
+
+def bench_lookup(sizes, scan_lookups=20, store_lookups=100000):
+    print(f"{'users':>10} {'scan (ms)':>12} {'store (us)':>12} {'load (ms)':>10} {'speedup':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "users.txt")
+            write_synthetic_users(path, size)
+
+            # Mix of hits spread over the file and misses, which are the worst case for a scan
+            names = [f"user{random.randrange(size)}" for _ in range(scan_lookups // 2)]
+            names += [f"missing{i}" for i in range(scan_lookups - len(names))]
+            scan = time_per_call(lambda n: scan_user_exists(path, n), names)
+
+            store = UserStore(path)
+            start = time.perf_counter()
+            store.refresh()
+            load = time.perf_counter() - start
+
+            names = [f"user{random.randrange(size)}" for _ in range(store_lookups)]
+            indexed = time_per_call(store.exists, names)
+
+            print(f"{size:>10} {scan * 1e3:>12.3f} {indexed * 1e6:>12.3f} {load * 1e3:>10.1f} {scan / indexed:>9.0f}x")
+
+
+def bench_verify_pool(worker_counts, logins=200, rounds=10):
+    # Imported here so the lookup benchmark runs without bcrypt installed
+    import bcrypt
+    from verify_pool import VerifyPool
+
+    hashed = bcrypt.hashpw(b"Password1", bcrypt.gensalt(rounds)).decode("utf-8")
+    pairs = [("Password1" if i % 2 else "wrong1", hashed) for i in range(logins)]
+
+    print(f"{'workers':>8} {'p50 (ms)':>10} {'p99 (ms)':>10} {'logins/s':>10}")
+    for workers in worker_counts:
+        pool = VerifyPool(workers=workers)
+        pool.verify_many(pairs)
+        stats = pool.stats()
+        pool.shutdown()
+        print(f"{workers:>8} {stats['p50_ms']:>10.1f} {stats['p99_ms']:>10.1f} {stats['throughput_per_s']:>10.1f}")
+
+
+def bench_rate_limiter(attempts=1000000, capacity=100000, sources=5000):
+    # Credential-stuffing trace: mostly never-seen usernames from a pool of
+    # source addresses, with a small set of real accounts being hammered
+    rng = random.Random(42)
+    trace = []
+    for i in range(attempts):
+        username = f"victim{rng.randrange(1000)}" if i % 10 == 0 else f"guess{i}"
+        trace.append((username, f"10.0.{rng.randrange(sources) // 256}.{rng.randrange(256)}"))
+
+    users = RateLimiter(3, 300, capacity=capacity)
+    addresses = RateLimiter(20, 300, capacity=capacity)
+    blocked = 0
+
+    start = time.perf_counter()
+    for username, source in trace:
+        if users.locked_for(username) or addresses.locked_for(source):
+            blocked += 1
+            continue
+        users.record_failure(username)
+        addresses.record_failure(source)
+    elapsed = time.perf_counter() - start
+
+    print(f"attempts: {attempts}  blocked before bcrypt: {blocked}")
+    print(f"tracked keys: users={len(users)} sources={len(addresses)} (cap {capacity})")
+    print(f"{attempts / elapsed:,.0f} attempts/s, {elapsed / attempts * 1e6:.2f} us per check+record")
+
+
+def bench_tokens(sessions=100000, validations=200000):
+    store = SessionStore()
+    signer = TokenSigner()
+    stateful = [store.create(f"user{i}", "user") for i in range(sessions)]
+    signed = [signer.issue(f"user{i}", "user") for i in range(sessions)]
+
+    for name, validate, tokens in (("session store", store.validate, stateful),
+                                   ("signed token", signer.verify, signed)):
+        picks = [tokens[random.randrange(sessions)] for _ in range(validations)]
+        per_call = time_per_call(validate, picks)
+        print(f"{name:>14}: {1 / per_call:>12,.0f} validations/s ({per_call * 1e6:.2f} us)")
+
+
+def write_synthetic_index(path, count):
+    # SHA-1 digests are uniform, so evenly spaced values with jitter look the
+    # same to a binary search and come out sorted without a sort step
+    step = 2 ** 160 // count
+    rng = random.Random(7)
+    with open(path, "wb") as file:
+        for i in range(count):
+            file.write((i * step + rng.randrange(step // 2)).to_bytes(RECORD_SIZE, "big"))
+
+
+def bench_breach_index(sizes, lookups=50000):
+    print(f"{'entries':>12} {'hit (us)':>10} {'miss (us)':>10} {'miss+bloom (us)':>16}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index_path = os.path.join(tmp, "breach.idx")
+            bloom_path = os.path.join(tmp, "breach.bloom")
+            write_synthetic_index(index_path, size)
+            build_bloom(index_path, bloom_path)
+
+            with open(index_path, "rb") as file:
+                data = file.read(RECORD_SIZE * min(size, 10000))
+            hits = [data[i:i + RECORD_SIZE] for i in range(0, len(data), RECORD_SIZE)]
+            hits = [random.choice(hits) for _ in range(lookups)]
+            misses = [os.urandom(RECORD_SIZE) for _ in range(lookups)]
+
+            plain = BreachIndex(index_path)
+            bloomed = BreachIndex(index_path, bloom_path)
+            hit = time_per_call(plain.contains_digest, hits)
+            miss = time_per_call(plain.contains_digest, misses)
+            bloom_miss = time_per_call(bloomed.contains_digest, misses)
+            plain.close()
+            bloomed.close()
+            print(f"{size:>12} {hit * 1e6:>10.2f} {miss * 1e6:>10.2f} {bloom_miss * 1e6:>16.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auth micro-benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="user counts for the lookup benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1],
+                        help="worker counts for the verify pool benchmark")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost for the verify pool benchmark")
+    parser.add_argument("--breach-sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="entry counts for the breached-password index benchmark")
+    parser.add_argument("--attempts", type=int, default=1000000, help="length of the rate limiter attack trace")
+    parser.add_argument("--only", choices=["lookup", "pool", "limiter", "tokens", "breach"], help="run a single benchmark")
+    args = parser.parse_args()
+
+    if args.only in (None, "lookup"):
+        print("=== user lookup: users.txt scan vs UserStore ===")
+        bench_lookup(args.sizes)
+    if args.only in (None, "pool"):
+        print("=== bcrypt verify pool ===")
+        bench_verify_pool(sorted(set(args.workers)), rounds=args.rounds)
+    if args.only in (None, "limiter"):
+        print("=== rate limiter: credential-stuffing replay ===")
+        bench_rate_limiter(args.attempts)
+    if args.only in (None, "tokens"):
+        print("=== token validation: session store vs signed tokens ===")
+        bench_tokens()
+    if args.only in (None, "breach"):
+        print("=== breached-password index lookup ===")
+        bench_breach_index(args.breach_sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import argparse
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+
+# An index file is nothing but sorted, de-duplicated 20-byte SHA-1 digests,
+# so record i lives at byte i * RECORD_SIZE and the count is size / RECORD_SIZE.
+RECORD_SIZE = 20
+
+# Bloom filter file: header followed by the bit array. Besides the bit and
+# hash counts the header holds the record count and a CRC32 of sampled
+# records of the index it was built from, so a filter left over from another
+# index is noticed instead of answering "absent" for digests it never saw.
+BLOOM_MAGIC = b"BLM2"
+BLOOM_HEADER = struct.Struct("<4sQIQI")
+# Index records read for that CRC32, spread evenly over the file
+FINGERPRINT_SAMPLES = 1024
+_UNPACK_HASHES = struct.Struct("<QQ").unpack_from
+
+
+def _parse_line(line, plaintext):
+    line = line.strip()
+    if not line:
+        return None
+    if plaintext:
+        return hashlib.sha1(line).digest()
+    # Have I Been Pwned style "HEX:count"; the count is ignored
+    try:
+        digest = bytes.fromhex(line.split(b":", 1)[0].decode("ascii"))
+    except ValueError:
+        return None
+    return digest if len(digest) == RECORD_SIZE else None
+
+
+def _write_run(records, directory):
+    records.sort()
+    fd, path = tempfile.mkstemp(dir=directory, prefix="breach-run-")
+    with os.fdopen(fd, "wb") as file:
+        file.write(b"".join(records))
+    return path
+
+
+def _read_run(path):
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(RECORD_SIZE * 65536)
+            if not block:
+                return
+            for i in range(0, len(block), RECORD_SIZE):
+                yield block[i:i + RECORD_SIZE]
+
+
+def build_index(source_path, index_path, plaintext=False, run_records=5000000):
+    """Build a sorted digest index from a breached-password list.
+
+    The source is split into sorted runs of ``run_records`` digests (a few
+    hundred MB of memory each) which are merged into the final file, so lists
+    far larger than RAM can be indexed. Returns the number of records.
+    """
+    directory = os.path.dirname(os.path.abspath(index_path))
+    runs = []
+    try:
+        records = []
+        with open(source_path, "rb") as file:
+            for line in file:
+                digest = _parse_line(line, plaintext)
+                if digest is None:
+                    continue
+                records.append(digest)
+                if len(records) >= run_records:
+                    runs.append(_write_run(records, directory))
+                    records = []
+        if records or not runs:
+            runs.append(_write_run(records, directory))
+
+        count = 0
+        previous = None
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            for digest in heapq.merge(*(_read_run(path) for path in runs)):
+                if digest != previous:
+                    out.write(digest)
+                    previous = digest
+                    count += 1
+        os.replace(tmp_path, index_path)
+        return count
+    finally:
+        for path in runs:
+            os.unlink(path)
+
+
+def _bloom_positions(digest, bits, hashes):
+    # The digest is already uniformly random, so two 64-bit slices of it are
+    # enough for double hashing; no extra hash function is needed
+    h1, h2 = _UNPACK_HASHES(digest)
+    h2 |= 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+def _index_fingerprint(index_file, count):
+    # Record count plus a CRC32 of at most FINGERPRINT_SAMPLES records and
+    # the last one, so checking it costs the same at any index size
+    crc = 0
+    samples = min(count, FINGERPRINT_SAMPLES)
+    for i in [i * count // samples for i in range(samples)] + ([count - 1] if count else []):
+        crc = zlib.crc32(os.pread(index_file.fileno(), RECORD_SIZE, i * RECORD_SIZE), crc)
+    return count, crc
+
+
+def build_bloom(index_path, bloom_path, bits_per_entry=10, hashes=7):
+    """Bloom filter over an index; about 1% false positives at the defaults."""
+    count = os.path.getsize(index_path) // RECORD_SIZE
+    with open(index_path, "rb") as index_file:
+        fingerprint = _index_fingerprint(index_file, count)
+    bits = max(64, count * bits_per_entry)
+    array = bytearray((bits + 7) // 8)
+    for digest in _read_run(index_path):
+        for position in _bloom_positions(digest, bits, hashes):
+            array[position >> 3] |= 1 << (position & 7)
+
+    with open(bloom_path, "wb") as file:
+        file.write(BLOOM_HEADER.pack(BLOOM_MAGIC, bits, hashes, *fingerprint))
+        file.write(array)
+
+
+class BreachIndex:
+    """Memory-mapped lookup of password digests in a built index.
+
+    A lookup is a binary search over the mapped file: about 30 record reads
+    at a billion entries, all served from the page cache once warm. With a
+    Bloom filter alongside, most misses are answered after a few bit tests
+    without touching the index at all.
+    """
+
+    def __init__(self, index_path, bloom_path=None):
+        self._index_file = open(index_path, "rb")
+        size = os.path.getsize(index_path)
+        self.count = size // RECORD_SIZE
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        self._bloom = None
+        if bloom_path and os.path.exists(bloom_path):
+            self._open_bloom(bloom_path)
+
+    def _open_bloom(self, bloom_path):
+        # A filter built from a different index would answer "absent" for
+        # digests that are in this one, so it is only used if it matches
+        bloom_file = open(bloom_path, "rb")
+        header = bloom_file.read(BLOOM_HEADER.size)
+        if len(header) == BLOOM_HEADER.size:
+            magic, bits, hashes, count, crc = BLOOM_HEADER.unpack(header)
+            if magic == BLOOM_MAGIC and (count, crc) == _index_fingerprint(self._index_file, self.count):
+                self._bloom_file = bloom_file
+                self._bloom = mmap.mmap(bloom_file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._bloom_bits, self._bloom_hashes = bits, hashes
+                return
+        bloom_file.close()
+        print(f"Warning: {bloom_path} was not built from this index and is ignored; "
+              f"rebuild it with `python breach_index.py build ... --bloom {bloom_path}`.")
+
+    def _maybe_in_bloom(self, digest):
+        # Same positions as _bloom_positions(), computed lazily so a miss
+        # usually stops after the first one or two bit tests
+        bloom, bits = self._bloom, self._bloom_bits
+        h1, h2 = _UNPACK_HASHES(digest)
+        h2 |= 1
+        for i in range(self._bloom_hashes):
+            position = (h1 + i * h2) % bits
+            if not bloom[BLOOM_HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def contains_digest(self, digest):
+        if self._bloom is not None and not self._maybe_in_bloom(digest):
+            return False
+
+        index = self._index
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mid * RECORD_SIZE
+            record = index[start:start + RECORD_SIZE]
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def __contains__(self, password):
+        return self.contains_digest(hashlib.sha1(password.encode("utf-8")).digest())
+
+    def close(self):
+        if self.count:
+            self._index.close()
+        self._index_file.close()
+        if self._bloom is not None:
+            self._bloom.close()
+            self._bloom_file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline breached-password index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="build an index from a SHA-1 (HEX[:count]) or plaintext list")
+    build.add_argument("source")
+    build.add_argument("index")
+    build.add_argument("--plaintext", action="store_true", help="source lines are passwords, not SHA-1 hex")
+    build.add_argument("--bloom", metavar="PATH", help="also write a Bloom filter to PATH")
+
+    check = commands.add_parser("check", help="look a password up in an index")
+    check.add_argument("index")
+    check.add_argument("password")
+    check.add_argument("--bloom", metavar="PATH")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        count = build_index(args.source, args.index, args.plaintext)
+        print(f"Indexed {count} unique digests into {args.index}")
+        if args.bloom:
+            build_bloom(args.index, args.bloom)
+            print(f"Bloom filter written to {args.bloom}")
+    else:
+        index = BreachIndex(args.index, args.bloom)
+        print("Breached" if args.password in index else "Not found")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+import bcrypt
+
+# Hash formats stored in users.txt:
+#   bcrypt  $2b$<cost>$<salt+hash>                    (bcrypt's own format)
+#   scrypt  $scrypt$<log2 N>$<r>$<p>$<salt>$<hash>    (base64, no padding)
+# Neither contains a comma, which separates the fields of a users.txt line.
+SCRYPT_PREFIX = "$scrypt$"
+
+DEFAULT_POLICY = {
+    "algorithm": "bcrypt",
+    "bcrypt_rounds": 12,
+    "scrypt_n": 2 ** 14,
+    "scrypt_r": 8,
+    "scrypt_p": 1,
+}
+
+# Policy used for new hashes; older hashes are upgraded on the next successful login
+policy = dict(DEFAULT_POLICY)
+
+
+def load_policy(path):
+    if os.path.exists(path):
+        with open(path, "r") as file:
+            policy.update(json.load(file))
+    return policy
+
+
+def save_policy(path):
+    with open(path, "w") as file:
+        json.dump(policy, file, indent=2)
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password_bytes, salt, n, r, p):
+    # hashlib refuses to allocate more than maxmem, which defaults to 32 MiB
+    maxmem = 128 * r * (n + p + 2) + 1024 * 1024
+    return hashlib.scrypt(password_bytes, salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=32)
+
+
+def hash_password(plain_text_password, algorithm=None, **params):
+    algorithm = algorithm or policy["algorithm"]
+    password_bytes = plain_text_password.encode("utf-8")
+
+    if algorithm == "bcrypt":
+        rounds = params.get("rounds", policy["bcrypt_rounds"])
+        return bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds)).decode("utf-8")
+
+    if algorithm == "scrypt":
+        n = params.get("n", policy["scrypt_n"])
+        if n < 2 or n & (n - 1):
+            raise ValueError("scrypt N must be a power of two")
+        r = params.get("r", policy["scrypt_r"])
+        p = params.get("p", policy["scrypt_p"])
+        salt = os.urandom(16)
+        digest = _scrypt(password_bytes, salt, n, r, p)
+        return f"{SCRYPT_PREFIX}{n.bit_length() - 1}${r}${p}${_b64(salt)}${_b64(digest)}"
+
+    raise ValueError(f"Unknown KDF algorithm: {algorithm}")
+
+
+def _parse_scrypt(hashed_password):
+    log_n, r, p, salt, digest = hashed_password[len(SCRYPT_PREFIX):].split("$")
+    return 2 ** int(log_n), int(r), int(p), _unb64(salt), _unb64(digest)
+
+
+def verify_password(plain_text_password, hashed_password):
+    password_bytes = plain_text_password.encode("utf-8")
+
+    if hashed_password.startswith(SCRYPT_PREFIX):
+        n, r, p, salt, digest = _parse_scrypt(hashed_password)
+        return hmac.compare_digest(_scrypt(password_bytes, salt, n, r, p), digest)
+
+    return bcrypt.checkpw(password_bytes, hashed_password.encode("utf-8"))
+
+
+def needs_rehash(hashed_password):
+    """True if the hash was made with another algorithm or cost than the policy."""
+    if hashed_password.startswith(SCRYPT_PREFIX):
+        if policy["algorithm"] != "scrypt":
+            return True
+        n, r, p, _, _ = _parse_scrypt(hashed_password)
+        return (n, r, p) != (policy["scrypt_n"], policy["scrypt_r"], policy["scrypt_p"])
+
+    if policy["algorithm"] != "bcrypt":
+        return True
+    # $2b$12$... → cost is the second field
+    return int(hashed_password.split("$")[2]) != policy["bcrypt_rounds"]
+
+
+def _time_hash(algorithm, samples=3, **params):
+    best = None
+    for _ in range(samples):
+        start = time.perf_counter()
+        hash_password("calibration1", algorithm, **params)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate(target_ms=100, algorithm="bcrypt", max_memory_mb=64):
+    """Benchmark this host and set the policy cost closest to target_ms per hash.
+
+    bcrypt cost and scrypt N both double the work per step, so we walk up
+    from a cheap setting until the next step would overshoot the target.
+    scrypt is additionally capped at max_memory_mb (128 * r * N bytes).
+    """
+    target = target_ms / 1000
+
+    if algorithm == "bcrypt":
+        rounds = 10
+        elapsed = _time_hash("bcrypt", rounds=rounds)
+        while rounds < 31 and elapsed * 2 <= target:
+            rounds += 1
+            elapsed = _time_hash("bcrypt", rounds=rounds)
+        policy.update(algorithm="bcrypt", bcrypt_rounds=rounds)
+        return {"algorithm": "bcrypt", "rounds": rounds, "ms": elapsed * 1000}
+
+    if algorithm == "scrypt":
+        r = policy["scrypt_r"]
+        p = policy["scrypt_p"]
+        n = 2 ** 12
+        elapsed = _time_hash("scrypt", n=n, r=r, p=p)
+        while elapsed * 2 <= target and 128 * r * n * 2 <= max_memory_mb * 1024 * 1024:
+            n *= 2
+            elapsed = _time_hash("scrypt", n=n, r=r, p=p)
+        policy.update(algorithm="scrypt", scrypt_n=n, scrypt_r=r, scrypt_p=p)
+        return {"algorithm": "scrypt", "n": n, "r": r, "p": p, "ms": elapsed * 1000}
+
+    raise ValueError(f"Unknown KDF algorithm: {algorithm}")
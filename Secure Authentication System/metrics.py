@@ -0,0 +1,150 @@
+import bisect
+import os
+import threading
+import time
+
+# Turned on with AUTH_METRICS=1 or enable(). While off, timer() hands back one
+# shared no-op context manager and count() returns immediately.
+ENABLED = os.environ.get("AUTH_METRICS") == "1"
+
+# Upper bounds in seconds, from tens of microseconds (dict lookups) to seconds (bcrypt)
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        # One slot per bucket plus the +Inf overflow
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def percentile(self, p):
+        # Upper bound of the bucket holding the p-th percentile
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank and n:
+                return bound
+        return 0.0
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def timer(name):
+    """Context manager recording how long its block took under name."""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def observe(name, seconds):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+
+def count(name, amount=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def render_prometheus(prefix="auth"):
+    """All counters and histograms in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for name, value in sorted(_counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+
+        if _histograms:
+            metric = f"{prefix}_phase_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+        for name, histogram in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, histogram.counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{phase="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{phase="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum{{phase="{name}"}} {histogram.total:.6f}')
+            lines.append(f'{metric}_count{{phase="{name}"}} {histogram.count}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, prefix="auth"):
+    # Written to a temp file and renamed so a scraper never reads half a file
+    with open(path + ".tmp", "w") as file:
+        file.write(render_prometheus(prefix))
+    os.replace(path + ".tmp", path)
+
+
+def dump():
+    """Human-readable summary for the terminal."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {name: h for name, h in _histograms.items()}
+
+    print("\n--- AUTH METRICS ---")
+    for name, value in sorted(counters.items()):
+        print(f"{name:<28} {value}")
+    if histograms:
+        print(f"\n{'phase':<24} {'count':>7} {'avg ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, h in sorted(histograms.items()):
+        avg = h.total / h.count * 1000 if h.count else 0.0
+        print(f"{name:<24} {h.count:>7} {avg:>9.3f} {h.percentile(50) * 1000:>9.3f} {h.percentile(99) * 1000:>9.3f}")
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Slots of an entry list; lists are much smaller than one object per key
+_WINDOW_START, _PREVIOUS, _CURRENT, _LOCKED_UNTIL, _PENDING = range(5)
+
+
+class RateLimiter:
+    """Sliding-window failure counter with lockout and a fixed memory budget.
+
+    Failures are counted with the sliding-window-counter approximation: the
+    previous window's count is weighted by how much of it still overlaps
+    the last ``window`` seconds. Reaching ``max_attempts`` locks the key for
+    ``lock_duration`` seconds.
+
+    Callers that check a key and record the outcome later should reserve()
+    the attempt first: attempts still in flight count toward the limit, so
+    concurrent checks can't add up to more guesses than ``max_attempts``.
+
+    At most ``capacity`` keys are tracked. Entries idle past their window
+    and lock expire lazily, and when the table is full the least recently
+    used key is dropped. Every operation is O(1).
+    """
+
+    def __init__(self, max_attempts, lock_duration, window=None, capacity=100000, clock=time.monotonic):
+        self.max_attempts = max_attempts
+        self.lock_duration = lock_duration
+        self.window = window or lock_duration
+        self.capacity = capacity
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, entry, now):
+        # Nothing left in either window, not locked and nothing in flight → the key can be forgotten
+        return (now >= entry[_WINDOW_START] + 2 * self.window and now >= entry[_LOCKED_UNTIL]
+                and not entry[_PENDING])
+
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry, now):
+            del self._entries[key]
+            return None
+        return entry
+
+    def locked_for(self, key):
+        """Seconds until key may try again, 0 if it isn't locked."""
+        now = self._clock()
+        with self._lock:
+            entry = self._get(key, now)
+            if entry is None:
+                return 0
+            return max(0.0, entry[_LOCKED_UNTIL] - now)
+
+    def _touch(self, key, now):
+        entry = self._get(key, now)
+        if entry is None:
+            entry = [now, 0, 0, 0.0, 0]
+            self._entries[key] = entry
+            self._evict(now)
+        else:
+            self._entries.move_to_end(key)
+            self._roll(entry, now)
+        return entry
+
+    def reserve(self, key):
+        """Claim one attempt for key before checking it; False if none are left.
+
+        Settle the claim with record_failure(key, reserved=True), reset(key)
+        or release(key).
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._touch(key, now)
+            if entry[_LOCKED_UNTIL] > now or self._estimate(entry, now) + entry[_PENDING] >= self.max_attempts:
+                return False
+            entry[_PENDING] += 1
+            return True
+
+    def release(self, key):
+        """Give back a reserved attempt without counting it (e.g. the check errored)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[_PENDING]:
+                entry[_PENDING] -= 1
+
+    def record_failure(self, key, reserved=False):
+        """Count a failure; returns True if this failure locked the key."""
+        now = self._clock()
+        with self._lock:
+            entry = self._touch(key, now)
+            if reserved and entry[_PENDING]:
+                # Same critical section, so no reserve() sees the slot free but the failure uncounted
+                entry[_PENDING] -= 1
+
+            entry[_CURRENT] += 1
+            if entry[_LOCKED_UNTIL] <= now and self._estimate(entry, now) >= self.max_attempts:
+                entry[_LOCKED_UNTIL] = now + self.lock_duration
+                # Start counting afresh once the lock runs out
+                entry[_WINDOW_START], entry[_PREVIOUS], entry[_CURRENT] = now + self.lock_duration, 0, 0
+                return True
+            return False
+
+    def reset(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _roll(self, entry, now):
+        elapsed = now - entry[_WINDOW_START]
+        if elapsed >= 2 * self.window:
+            entry[_WINDOW_START], entry[_PREVIOUS], entry[_CURRENT] = now, 0, 0
+        elif elapsed >= self.window:
+            entry[_WINDOW_START] += self.window
+            entry[_PREVIOUS], entry[_CURRENT] = entry[_CURRENT], 0
+
+    def _estimate(self, entry, now):
+        overlap = 1 - max(0.0, now - entry[_WINDOW_START]) / self.window
+        return entry[_PREVIOUS] * max(0.0, overlap) + entry[_CURRENT]
+
+    def _evict(self, now):
+        # Drop a couple of expired entries from the cold end, then enforce the cap
+        for _ in range(2):
+            key, entry = next(iter(self._entries.items()))
+            if not self._expired(entry, now):
+                break
+            del self._entries[key]
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,231 @@
+import gc
+import hashlib
+import heapq
+import os
+import secrets
+import threading
+import time
+
+# Don't write a touch record more often than this per session. After a restart
+# a session may have lost up to this much of its idle allowance.
+TOUCH_LOG_INTERVAL = 60
+
+
+class Session:
+    __slots__ = ("key", "username", "role", "created", "last_seen", "logged_seen")
+
+    def __init__(self, key, username, role, created, last_seen):
+        self.key = key
+        self.username = username
+        self.role = role
+        self.created = created
+        self.last_seen = last_seen
+        self.logged_seen = last_seen
+
+
+class SessionStore:
+    """Server-side sessions with idle and absolute expiry.
+
+    Sessions are indexed by a SHA-256 of the token, so neither memory nor the
+    log file holds usable tokens. Expiry runs off a min-heap of deadlines:
+    only sessions that are actually due get looked at, never the whole
+    table. A heap entry made stale by activity is pushed back with the new
+    deadline when it surfaces.
+
+    With ``path`` set, every change is appended to a log file as one line:
+        C,<key>,<username>,<role>,<created>,<last_seen>   create
+        T,<key>,<last_seen>                               touch / refresh
+        R,<key>                                           revoke
+    The log is replayed on start-up and compacted when mostly dead.
+    """
+
+    def __init__(self, path=None, idle_timeout=1800, absolute_timeout=8 * 3600,
+                 max_per_user=5, clock=time.time):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.absolute_timeout = absolute_timeout
+        self.max_per_user = max_per_user
+        self.touch_interval = min(TOUCH_LOG_INTERVAL, idle_timeout / 10)
+        self._clock = clock
+        self._sessions = {}
+        self._by_user = {}
+        self._deadlines = []
+        self._lock = threading.RLock()
+        self._log = None
+
+        if path:
+            self._load()
+            self._log = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _deadline(self, session):
+        return min(session.created + self.absolute_timeout, session.last_seen + self.idle_timeout)
+
+    def _write(self, line):
+        if self._log is not None:
+            self._log.write(line + "\n")
+            self._log.flush()
+
+    def create(self, username, role=None):
+        token = secrets.token_hex(16)
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            session = self._add(self._key(token), username, role or "", now, now)
+            self._write(f"C,{session.key},{username},{session.role},{now:.3f},{now:.3f}")
+
+            # Over the cap → drop the user's oldest sessions
+            tokens = self._by_user[username]
+            while len(tokens) > self.max_per_user:
+                self._remove(next(iter(tokens)), log=True)
+        return token
+
+    def _add(self, key, username, role, created, last_seen):
+        session = Session(key, username, role, created, last_seen)
+        self._sessions[key] = session
+        self._by_user.setdefault(username, {})[key] = None
+        heapq.heappush(self._deadlines, (self._deadline(session), key))
+        return session
+
+    def validate(self, token):
+        """Return the live Session for token (sliding its idle timer), or None."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(self._key(token))
+            if session is None or self._deadline(session) <= now:
+                return None
+            session.last_seen = now
+            if now - session.logged_seen >= self.touch_interval:
+                self._touch_log(session)
+            return session
+
+    def refresh(self, token):
+        with self._lock:
+            session = self.validate(token)
+            if session is None:
+                return False
+            self._touch_log(session)
+            return True
+
+    def _touch_log(self, session):
+        session.logged_seen = session.last_seen
+        self._write(f"T,{session.key},{session.last_seen:.3f}")
+
+    def revoke(self, token):
+        with self._lock:
+            return self._remove(self._key(token), log=True)
+
+    def revoke_user(self, username):
+        with self._lock:
+            keys = list(self._by_user.get(username, ()))
+            for key in keys:
+                self._remove(key, log=True)
+            return len(keys)
+
+    def _remove(self, key, log=False):
+        # The heap entry is left behind and skipped when it surfaces
+        session = self._sessions.pop(key, None)
+        if session is None:
+            return False
+        tokens = self._by_user[session.username]
+        del tokens[key]
+        if not tokens:
+            del self._by_user[session.username]
+        if log:
+            self._write(f"R,{key}")
+        return True
+
+    def _expire(self, now):
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, key = heapq.heappop(self._deadlines)
+            session = self._sessions.get(key)
+            if session is None:
+                continue
+            deadline = self._deadline(session)
+            if deadline > now:
+                # Used since this entry was pushed; requeue with the real deadline
+                heapq.heappush(self._deadlines, (deadline, key))
+            else:
+                # No log record needed, replay drops expired sessions anyway
+                self._remove(key)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        # Replay allocates an object per session; the cyclic GC would rescan
+        # the growing heap over and over and dominate the load time
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            records = self._replay()
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        if records > 2 * len(self._sessions) + 1000:
+            self.compact()
+
+    def _replay(self):
+        records = 0
+        sessions = {}
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                parts = line.rstrip("\n").split(",")
+                kind = parts[0]
+                records += 1
+                if kind == "C" and len(parts) == 6:
+                    sessions[parts[1]] = Session(parts[1], parts[2], parts[3], float(parts[4]), float(parts[5]))
+                elif kind == "T" and len(parts) == 3 and parts[1] in sessions:
+                    session = sessions[parts[1]]
+                    session.last_seen = session.logged_seen = float(parts[2])
+                elif kind == "R" and len(parts) == 2:
+                    sessions.pop(parts[1], None)
+                # Anything else is a torn last line from a crash; skip it
+
+        # Build the indexes in one pass; create records are already in age order
+        now = self._clock()
+        absolute, idle = self.absolute_timeout, self.idle_timeout
+        live, by_user, deadlines = self._sessions, self._by_user, []
+        for key, session in sessions.items():
+            # Inlined _deadline(); this loop runs once per stored session
+            deadline = min(session.created + absolute, session.last_seen + idle)
+            if deadline > now:
+                live[key] = session
+                user_keys = by_user.get(session.username)
+                if user_keys is None:
+                    by_user[session.username] = {key: None}
+                else:
+                    user_keys[key] = None
+                deadlines.append((deadline, key))
+        heapq.heapify(deadlines)
+        self._deadlines = deadlines
+        return records
+
+    def compact(self):
+        """Rewrite the log with one create record per live session."""
+        if not self.path:
+            return
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                for s in self._sessions.values():
+                    file.write(f"C,{s.key},{s.username},{s.role},{s.created:.3f},{s.last_seen:.3f}\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+            if self._log is not None:
+                self._log.close()
+                self._log = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def __len__(self):
+        return len(self._sessions)
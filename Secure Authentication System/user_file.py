@@ -0,0 +1,197 @@
+import argparse
+import contextlib
+import fcntl
+import os
+import tempfile
+import zlib
+
+# users.txt format
+#
+#   #users-v2
+#   username,password_hash,role,crc32
+#
+# The crc32 (8 hex digits) covers "username,password_hash,role", so a record
+# torn by a crash or interleaved with another write is detected and skipped.
+# Files without the header line are the original format, username,hash,role
+# with no checksum; they stay readable and are upgraded on their first write.
+# A username may appear more than once: a hash upgrade appends a new record,
+# and the last one wins.
+HEADER = "#users-v2"
+
+
+def _checksum(body):
+    return format(zlib.crc32(body.encode("utf-8")), "08x")
+
+
+def format_record(username, password_hash, role):
+    body = f"{username},{password_hash},{role}"
+    return f"{body},{_checksum(body)}\n"
+
+
+def parse_record(line, strict=True):
+    """Return (username, password_hash, role) or None for a bad line.
+
+    With strict=False (files without the header) three-field lines without
+    a checksum are accepted too.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    parts = line.split(",")
+
+    if len(parts) == 4:
+        body = line[:line.rfind(",")]
+        if _checksum(body) != parts[3]:
+            return None
+    elif strict or len(parts) < 2:
+        return None
+
+    if not parts[0] or not parts[1]:
+        return None
+    role = parts[2] if len(parts) > 2 and parts[2] else "user"
+    return parts[0], parts[1], role
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Exclusive advisory lock for writers of path.
+
+    The lock lives on a sidecar file because a rewrite swaps the data file's
+    inode, which would silently drop a lock held on the old one.
+    """
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _has_header(path):
+    with open(path, "rb") as file:
+        return file.readline().rstrip(b"\r\n") == HEADER.encode("ascii")
+
+
+def _ensure_format(path):
+    # Call with the lock held
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        rewrite(path, HEADER + "\n")
+    elif not _has_header(path):
+        compact(path, _locked=True)
+
+
+def append_record(path, username, password_hash, role):
+    """Append one record with a single O_APPEND write. Call with the lock held."""
+    _ensure_format(path)
+    data = format_record(username, password_hash, role).encode("utf-8")
+
+    fd = os.open(path, os.O_RDWR | os.O_APPEND)
+    try:
+        # A crash may have left a torn last line; start ours on a fresh one
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            data = b"\n" + data
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def append_records(path, records):
+    """Add many (username, hash, role) records in one atomic rewrite. Call with the lock held."""
+    _ensure_format(path)
+    with open(path, "rb") as file:
+        existing = file.read()
+    if existing and not existing.endswith(b"\n"):
+        existing += b"\n"
+    new = "".join(format_record(*record) for record in records)
+    rewrite(path, existing + new.encode("utf-8"))
+
+
+def rewrite(path, content):
+    # Temp file + fsync + rename, so the file is either old or new, never half
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    directory = os.path.dirname(os.path.abspath(path))
+    mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".users-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _scan(path, stats):
+    # Return the intact records of path, the last one per username, counting the rest
+    records = {}
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as file:
+        strict = file.readline().rstrip("\r\n") == HEADER
+        file.seek(0)
+        for line in file:
+            if not line.strip() or line.startswith("#"):
+                continue
+            record = parse_record(line, strict)
+            # Without checksums the only sign of a torn legacy record is a
+            # missing newline at the end of the file
+            if record is None or (not strict and not line.endswith("\n")):
+                stats["corrupt"] += 1
+                continue
+            if record[0] in records:
+                stats["duplicate"] += 1
+            # Keeps the username's first position but its latest hash
+            records[record[0]] = record
+    stats["kept"] = len(records)
+    return list(records.values())
+
+
+def compact(path, _locked=False):
+    """Rewrite path in the checksummed format.
+
+    Corrupt and torn lines are dropped, and only the last record of each
+    username is kept (the one logins use; earlier ones were superseded by
+    a rehash). Returns counts of
+    what was kept and dropped.
+    """
+    lock = contextlib.nullcontext() if _locked else locked(path)
+    with lock:
+        stats = {"kept": 0, "corrupt": 0, "duplicate": 0}
+        if not os.path.exists(path):
+            return stats
+        out = [HEADER + "\n"]
+        out.extend(format_record(*record) for record in _scan(path, stats))
+        rewrite(path, "".join(out))
+        return stats
+
+
+def check(path):
+    """Same counts as compact() without changing anything."""
+    stats = {"kept": 0, "corrupt": 0, "duplicate": 0}
+    _scan(path, stats)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or repair the users file")
+    parser.add_argument("command", choices=["check", "compact"])
+    parser.add_argument("path", nargs="?", default="users.txt")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        stats = check(args.path)
+        print(f"{stats['kept']} good, {stats['corrupt']} corrupt, {stats['duplicate']} duplicate records")
+    else:
+        stats = compact(args.path)
+        print(f"Kept {stats['kept']} records, dropped {stats['corrupt']} corrupt "
+              f"and {stats['duplicate']} duplicate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+import threading
+
+import user_file
+
+
+class UserStore:
+    """In-memory index of the user file, keyed by username.
+
+    The file is read once and afterwards only the bytes appended since the
+    last read are parsed. If the file shrinks or is rewritten in place the
+    index is rebuilt from scratch. Records failing their checksum are skipped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._users = {}
+        self._offset = 0
+        self._mtime = None
+        self._size = None
+        self._inode = None
+        # Set once the checksummed header is seen; legacy lines are then rejected
+        self._strict = False
+        # Last bytes consumed, to notice a rewrite that reused the old inode number
+        self._tail = b""
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        # One stat() per lookup is far cheaper than re-reading the whole file
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            with self._lock:
+                self._reset()
+            return
+
+        if st.st_mtime_ns == self._mtime and st.st_size == self._size and st.st_ino == self._inode:
+            return
+
+        with self._lock:
+            replaced = self._inode is not None and st.st_ino != self._inode
+            rewritten = st.st_size == self._size and st.st_mtime_ns != self._mtime
+            if replaced or rewritten or st.st_size < self._offset:
+                # Swapped, truncated or edited in place → the old index can't be trusted
+                self._reset()
+            self._read_from(self._offset)
+            self._mtime = st.st_mtime_ns
+            self._size = st.st_size
+            self._inode = st.st_ino
+
+    def _reset(self):
+        self._users = {}
+        self._offset = 0
+        self._mtime = None
+        self._size = None
+        self._inode = None
+        self._strict = False
+        self._tail = b""
+
+    def _read_from(self, offset):
+        with open(self.path, "rb") as file:
+            file.seek(offset - len(self._tail))
+            data = file.read()
+
+        if not data.startswith(self._tail):
+            # The bytes we already parsed have changed under the same inode
+            self._reset()
+            return self._read_from(0)
+        data = data[len(self._tail):]
+
+        # Only consume complete lines, a writer may still be mid-append
+        end = data.rfind(b"\n")
+        if end == -1:
+            return
+        lines = data[:end].split(b"\n")
+        if offset == 0 and lines[0].rstrip(b"\r") == user_file.HEADER.encode("ascii"):
+            self._strict = True
+        for raw in lines:
+            self._add_line(raw.decode("utf-8", "replace"))
+        self._offset = offset + end + 1
+        self._tail = data[max(0, end + 1 - 64):end + 1]
+
+    def _add_line(self, line):
+        record = user_file.parse_record(line, self._strict)
+        if record is None:
+            return
+        # Last entry wins: a rehash appends the user's new hash
+        self._users[record[0]] = record[1:]
+
+    def get(self, username):
+        """Return (password_hash, role) for username, or None."""
+        self.refresh()
+        return self._users.get(username)
+
+    def exists(self, username):
+        self.refresh()
+        return username in self._users
+
+    def get_role(self, username):
+        record = self.get(username)
+        return record[1] if record else None
+
+    def __len__(self):
+        self.refresh()
+        return len(self._users)
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import kdf
+
+
+class PoolBusyError(Exception):
+    """Raised when the queue is full and the caller can't wait any longer."""
+
+
+class VerifyPool:
+    """Bounded worker pool for password hashing and verification.
+
+    bcrypt releases the GIL while it works, so plain threads spread the
+    hashing over every core. At most ``max_pending`` jobs may be queued or
+    running; submit() blocks until a slot frees up (backpressure) and raises
+    PoolBusyError once ``timeout`` runs out.
+    """
+
+    def __init__(self, workers=None, max_pending=None, latency_window=10000):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 8
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._latencies = deque(maxlen=latency_window)
+        self._completed = 0
+        self._rejected = 0
+        self._started = time.perf_counter()
+        self._stats_lock = threading.Lock()
+
+    def submit(self, func, *args, timeout=None):
+        if not self._slots.acquire(timeout=timeout):
+            with self._stats_lock:
+                self._rejected += 1
+            raise PoolBusyError(f"verification queue full ({self.max_pending} pending)")
+
+        queued_at = time.perf_counter()
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._done(queued_at))
+        return future
+
+    def _done(self, queued_at):
+        self._slots.release()
+        with self._stats_lock:
+            self._latencies.append(time.perf_counter() - queued_at)
+            self._completed += 1
+
+    def submit_verify(self, plain_text_password, hashed_password, timeout=None):
+        return self.submit(_checkpw, plain_text_password, hashed_password, timeout=timeout)
+
+    def submit_hash(self, plain_text_password, timeout=None):
+        return self.submit(_hashpw, plain_text_password, timeout=timeout)
+
+    def verify_many(self, pairs, timeout=None):
+        # Keep submitting while results come back; submit() throttles us to max_pending
+        futures = [self.submit_verify(password, hashed, timeout=timeout) for password, hashed in pairs]
+        return [future.result() for future in futures]
+
+    def hash_many(self, passwords, timeout=None):
+        futures = [self.submit_hash(password, timeout=timeout) for password in passwords]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        """Latency percentiles (queue wait + work) and throughput since start."""
+        with self._stats_lock:
+            samples = sorted(self._latencies)
+            completed = self._completed
+            rejected = self._rejected
+        elapsed = time.perf_counter() - self._started
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+
+        return {
+            "workers": self.workers,
+            "completed": completed,
+            "rejected": rejected,
+            "p50_ms": percentile(50) * 1000,
+            "p99_ms": percentile(99) * 1000,
+            "throughput_per_s": completed / elapsed if elapsed else 0.0,
+        }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def _checkpw(plain_text_password, hashed_password):
+    return kdf.verify_password(plain_text_password, hashed_password)
+
+
+def _hashpw(plain_text_password):
+    return kdf.hash_password(plain_text_password)